@@ -1,37 +1,49 @@
+import time
+_T_IMPORT = time.perf_counter()  # soğuk başlatma süresi ölçümü için
+
 import os
+import sys
 import uuid
+import re
+import asyncio
+import contextvars
+import hashlib
+import itertools
+import json
+import threading
 import datetime as dt
 import logging
-import time
+import subprocess
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, Depends, status, Request, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, status, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from jose import jwt, JWTError
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
 from pydantic import BaseModel, EmailStr
 from pydantic_settings import BaseSettings
 
 from sqlalchemy import (
     create_engine, Column, String, Boolean, Enum, Text, Integer, Float,
-    TIMESTAMP, ForeignKey, CheckConstraint, func, text, UniqueConstraint
+    TIMESTAMP, ForeignKey, CheckConstraint, func, text, UniqueConstraint, event
 )
 from sqlalchemy.dialects.postgresql import UUID as PGUUID, TSRANGE
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.pool import QueuePool
 from passlib.hash import bcrypt
 
-import shutil
-
-# ----------------------------- Firebase (opsiyonel) -----------------------------
-try:
-    import firebase_admin
-    from firebase_admin import credentials, messaging
-except Exception:
-    firebase_admin = None
-    credentials = None
-    messaging = None
+# Opsiyonel ağır bağımlılıklar (firebase_admin, Pillow) ilk kullanımda yüklenir;
+# bkz. _fcm_messaging() ve _pil().
 
 # --------------------------------------------------------------------------------
 # Paths / Static
@@ -39,11 +51,40 @@ except Exception:
 BASE_DIR = Path(__file__).parent
 STATIC_DIR = BASE_DIR / "static"
 UPLOAD_DIR = STATIC_DIR / "uploads"
-STATIC_DIR.mkdir(exist_ok=True)
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+UPLOAD_TMP_DIR = UPLOAD_DIR / ".tmp"
+VARIANT_DIR = UPLOAD_DIR / "variants"
 
-app = FastAPI(title="YALTES Car API")
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+# İçerik adresli görseller: /images/<sha256>.<ext>[?w=<genişlik>]
+IMAGE_WIDTHS = (160, 320, 640, 1280)
+THUMB_WIDTH = 320
+_IMAGE_URL_RE = re.compile(r"/images/[0-9a-f]{64}\.(?:jpg|png|webp|gif)$")
+
+# --------------------------------------------------------------------------------
+# Lifespan (hafif; şema/seed için: python app.py migrate)
+# --------------------------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    t0 = time.perf_counter()
+    for d in (STATIC_DIR, UPLOAD_DIR, UPLOAD_TMP_DIR, VARIANT_DIR):
+        d.mkdir(parents=True, exist_ok=True)
+    logging.info("STATIC_DIR = %s", STATIC_DIR.resolve())
+    logging.info("UPLOAD_DIR = %s", UPLOAD_DIR.resolve())
+    if settings.AUTO_MIGRATE:
+        await run_in_threadpool(bootstrap)
+    total_ms = (time.perf_counter() - _T_IMPORT) * 1000
+    logging.info("Startup ready in %.1f ms (lifespan %.1f ms)", total_ms, (time.perf_counter() - t0) * 1000)
+    if total_ms > settings.STARTUP_BUDGET_MS:
+        logging.warning("Startup exceeded budget: %.1f ms > %d ms", total_ms, settings.STARTUP_BUDGET_MS)
+    yield
+    if _image_executor is not None:
+        _image_executor.shutdown(wait=False)
+    engine.dispose()
+    for eng in replica_router.engines:
+        eng.dispose()
+
+app = FastAPI(title="YALTES Car API", lifespan=lifespan)
+# dizinler lifespan'de oluşturulur
+app.mount("/static", StaticFiles(directory=STATIC_DIR, check_dir=False), name="static")
 
 # --------------------------------------------------------------------------------
 # Settings
@@ -54,42 +95,296 @@ class Settings(BaseSettings):
     # Firebase hizmet hesabı dosya yolu (opsiyonel)
     FIREBASE_CREDENTIALS_FILE: Optional[str] = None
     FIREBASE_CREDENTIALS: Optional[str] = None  # eski isim
+    # Canlı olay akışı (/events)
+    EVENTS_QUEUE_SIZE: int = 256        # abone başına kuyruk; dolarsa bağlantı kapatılır
+    EVENTS_BACKLOG: int = 2048          # Last-Event-ID ile devam için saklanan olay sayısı
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_REAUTH_SECONDS: float = 900.0  # akış bu süre sonunda kapanır; istemci yeniden bağlanır,
+                                          # kullanıcı (aktiflik/rol) yeniden doğrulanır
+    # Görsel yükleme
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    IMAGE_WORKERS: int = 2
+    IMAGE_MAX_PIXELS: int = 50_000_000  # Pillow'un bomba sınırının (~89M) altında
+    # Başlatma: şema/seed normalde `python app.py migrate` ile; geliştirmede AUTO_MIGRATE=true
+    AUTO_MIGRATE: bool = False
+    STARTUP_BUDGET_MS: int = 1000
+    # Teşhis: DEBUG -> Server-Timing başlığı + N+1 uyarıları; PROFILER_ENABLED -> /debug/profile
+    DEBUG: bool = False
+    N_PLUS_ONE_THRESHOLD: int = 5
+    PROFILER_ENABLED: bool = False
+    # Bağlantı havuzu (primary ve her replika için ayrı havuz)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800         # saniye; -1 kapatır
+    DB_POOL_PRE_PING: bool = True       # recycle yeterliyse kapatılabilir (checkout başına SELECT 1)
+    # Okuma replikaları; env'de JSON liste: DATABASE_REPLICA_URLS='["postgresql://..."]'
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_RETRY_SECONDS: float = 30.0  # hata veren replika bu süre boyunca atlanır
+    DB_REPLICA_POOL_TIMEOUT: float = 2.0  # dolu replika havuzunda kısa bekle, sonra sıradakine geç
     class Config:
         env_file = ".env"
 
 settings = Settings()
 
+# --------------------------------------------------------------------------------
+# Metrics (Prometheus; prometheus_client opsiyonel)
+# --------------------------------------------------------------------------------
+# Çoklu worker: PROMETHEUS_MULTIPROC_DIR ayarlanırsa /metrics tüm süreçleri toplar; ölen worker
+# dosyalarının temizliği için gunicorn.conf.py ile çalıştırın (on_starting/child_exit).
+try:
+    import prometheus_client as prom
+except Exception:
+    prom = None
+
+class _NoopMetric:
+    def labels(self, *args):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+_NOOP_METRIC = _NoopMetric()
+
+def _metric(kind: str, name: str, doc: str, labels=(), **kw):
+    if prom is None:
+        return _NOOP_METRIC
+    return getattr(prom, kind)(name, doc, labels, **kw)
+
+_LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+_DB_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0)
+
+HTTP_LATENCY = _metric("Histogram", "http_request_duration_seconds", "HTTP request latency by route template",
+                       ("method", "route", "status"), buckets=_LATENCY_BUCKETS)
+HTTP_IN_FLIGHT = _metric("Gauge", "http_requests_in_flight", "Requests currently being handled",
+                         multiprocess_mode="livesum")
+DB_QUERY_SECONDS = _metric("Histogram", "db_query_duration_seconds", "Single DB statement duration",
+                           ("db",), buckets=_DB_BUCKETS)
+DB_QUERIES_PER_REQUEST = _metric("Histogram", "db_queries_per_request", "DB statements per HTTP request",
+                                 ("route",), buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 34))
+DB_TIME_PER_REQUEST = _metric("Histogram", "db_time_per_request_seconds", "Total DB time per HTTP request",
+                              ("route",), buckets=_LATENCY_BUCKETS)
+DB_POOL_WAIT = _metric("Histogram", "db_pool_checkout_wait_seconds",
+                       "Time to get a connection from the pool (incl. new connects)", ("db",), buckets=_DB_BUCKETS)
+DB_POOL_SIZE = _metric("Gauge", "db_pool_size", "Configured pool size", ("db",), multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = _metric("Gauge", "db_pool_checked_out", "Connections in use", ("db",),
+                              multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = _metric("Gauge", "db_pool_overflow", "Connections above pool_size", ("db",),
+                           multiprocess_mode="livesum")
+PASSWORD_HASH_SECONDS = _metric("Histogram", "password_hash_seconds", "bcrypt hash/verify duration",
+                                ("op",), buckets=(.05, .1, .2, .3, .5, .75, 1.0, 2.0))
+FCM_SEND_SECONDS = _metric("Histogram", "fcm_send_seconds", "FCM multicast send duration",
+                           ("outcome",), buckets=_LATENCY_BUCKETS)
+
+class QueryLog:
+    """SQL ifadesi sayısı/süresi; `queries` verilirse ifadeler de (ham SQL, süre) olarak tutulur."""
+    __slots__ = ("count", "seconds", "queries")
+
+    def __init__(self, record: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        self.queries: Optional[list] = [] if record else None
+
+    def add(self, statement: str, dur: float):
+        self.count += 1
+        self.seconds += dur
+        if self.queries is not None:
+            self.queries.append((statement, dur))
+
+    def grouped(self) -> list:
+        """Normalize edilmiş SQL'e göre [(sql, adet, toplam süre)], en çok tekrar eden önce."""
+        groups: dict = {}
+        for statement, dur in self.queries or ():
+            key = normalize_sql(statement)
+            n, total = groups.get(key, (0, 0.0))
+            groups[key] = (n + 1, total + dur)
+        return sorted(((k, n, t) for k, (n, t) in groups.items()), key=lambda g: (-g[1], -g[2]))
+
+    def summary(self) -> str:
+        return "\n".join(f"  {n}x {t * 1000:.1f} ms  {sql}" for sql, n, t in self.grouped())
+
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_PARAM = re.compile(r"%\(\w+\)s|%s|(?<![:\w]):\w+|\$\d+|\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:::\w+)?(?:\s*,\s*\?(?:::\w+)?)+\s*\)", re.IGNORECASE)
+_SQL_WS = re.compile(r"\s+")
+
+def normalize_sql(statement: str) -> str:
+    """Parametre/literal'leri `?` yapar, IN listelerini ve boşlukları sıkıştırır."""
+    s = _SQL_STRING.sub("?", statement)
+    s = _SQL_PARAM.sub("?", s)
+    s = _SQL_IN_LIST.sub("IN (?)", s)
+    return _SQL_WS.sub(" ", s).strip()
+
+# istek başına sayaçlar (middleware kurar) ve query_budget() kayıtçıları (tüm thread'ler)
+_request_db: contextvars.ContextVar = contextvars.ContextVar("request_db", default=None)
+_query_recorders: tuple = ()
+_query_recorders_lock = threading.Lock()
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+@contextmanager
+def query_budget(max_queries: int):
+    """Blok içinde çalışan SQL ifadelerini sayar; `max_queries` aşılırsa QueryBudgetExceeded."""
+    global _query_recorders
+    rec = QueryLog(record=True)
+    with _query_recorders_lock:
+        _query_recorders = (*_query_recorders, rec)
+    try:
+        yield rec
+    finally:
+        with _query_recorders_lock:
+            _query_recorders = tuple(r for r in _query_recorders if r is not rec)
+    if rec.count > max_queries:
+        raise QueryBudgetExceeded(f"{rec.count} queries > budget {max_queries}:\n{rec.summary()}")
+
+def _timed_pool_class(name: str):
+    wait = DB_POOL_WAIT.labels(name)
+    size, checked_out, overflow = (DB_POOL_SIZE.labels(name), DB_POOL_CHECKED_OUT.labels(name),
+                                   DB_POOL_OVERFLOW.labels(name))
+
+    class TimedQueuePool(QueuePool):
+        # gauge'lar bağlantı alındıktan/iade edildikten sonra güncellenir;
+        # checkin olayı iadeden önce tetiklendiği için orada bir eksik sayardı
+        def _do_get(self):
+            t = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                wait.observe(time.perf_counter() - t)
+                self._update_gauges()
+
+        def _do_return_conn(self, record):
+            try:
+                super()._do_return_conn(record)
+            finally:
+                self._update_gauges()
+
+        def _update_gauges(self):
+            size.set(self.size())
+            checked_out.set(self.checkedout())
+            overflow.set(max(self.overflow(), 0))
+
+    return TimedQueuePool
+
+def _instrument_engine(eng, name: str):
+    query_hist = DB_QUERY_SECONDS.labels(name)
+
+    @event.listens_for(eng, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(eng, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        dur = time.perf_counter() - conn.info["query_start"].pop()
+        query_hist.observe(dur)
+        stats = _request_db.get()
+        if stats is not None:
+            stats.add(statement, dur)
+        for rec in _query_recorders:
+            rec.add(statement, dur)
+
+    @event.listens_for(eng, "handle_error")
+    def _failed(ctx):
+        # başarısız ifadede after_cursor_execute gelmez; başlangıç zamanı yığında kalmasın
+        starts = ctx.connection.info.get("query_start") if ctx.connection is not None else None
+        if starts:
+            starts.pop()
+
 # --------------------------------------------------------------------------------
 # DB
 # --------------------------------------------------------------------------------
-engine = create_engine(settings.DATABASE_URL, future=True, pool_pre_ping=True)
+def _make_engine(url: str, name: str, pool_timeout: Optional[float] = None):
+    eng = create_engine(
+        url, future=True, poolclass=_timed_pool_class(name),
+        pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT if pool_timeout is None else pool_timeout,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    _instrument_engine(eng, name)
+    return eng
+
+engine = _make_engine(settings.DATABASE_URL, "primary")
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+class ReplicaRouter:
+    """Replikalar arasında round-robin; bağlantı hatası veren replika bir süre devre dışı kalır."""
+
+    def __init__(self, urls: List[str], retry_seconds: float):
+        self.engines = [_make_engine(u, f"replica{i}", settings.DB_REPLICA_POOL_TIMEOUT)
+                        for i, u in enumerate(urls)]
+        self.sessions = [sessionmaker(bind=e, autoflush=False, autocommit=False, future=True)
+                         for e in self.engines]
+        self._down_until = [0.0] * len(self.engines)
+        self._counter = itertools.count()
+        self._retry = retry_seconds
+
+    def candidates(self) -> List[int]:
+        """Bu istekte denenecek sağlıklı replikalar, round-robin sırasıyla."""
+        n = len(self.engines)
+        if not n:
+            return []
+        start = next(self._counter) % n
+        now = time.monotonic()
+        return [i for i in ((start + k) % n for k in range(n)) if self._down_until[i] <= now]
+
+    def mark_down(self, i: int, err: Exception):
+        self._down_until[i] = time.monotonic() + self._retry
+        logging.warning("Replica %d unavailable for %.0fs: %s", i, self._retry, err)
+
+replica_router = ReplicaRouter(settings.DATABASE_REPLICA_URLS, settings.REPLICA_RETRY_SECONDS)
 Base = declarative_base()
 
 # --------------------------------------------------------------------------------
 # Logging
 # --------------------------------------------------------------------------------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
-logging.info("STATIC_DIR = %s", STATIC_DIR.resolve())
-logging.info("UPLOAD_DIR = %s", UPLOAD_DIR.resolve())
 
 # --------------------------------------------------------------------------------
-# Firebase init (tek ve opsiyonel)
+# Firebase init (tek, opsiyonel ve tembel)
 # --------------------------------------------------------------------------------
-FCM_READY = False
-if firebase_admin:
+_fcm_lock = threading.Lock()
+_fcm_loaded = False
+_fcm_module = None
+
+def _init_fcm():
+    try:
+        import firebase_admin
+        from firebase_admin import credentials, messaging
+    except Exception:
+        logging.warning("FCM disabled (firebase_admin not installed)")
+        return None
     cred_path = settings.FIREBASE_CREDENTIALS_FILE or settings.FIREBASE_CREDENTIALS
-    if cred_path and Path(cred_path).exists():
-        try:
-            firebase_admin.initialize_app(credentials.Certificate(cred_path))
-            FCM_READY = True
-            logging.info("Firebase Admin SDK initialized.")
-        except Exception as e:
-            logging.warning("Firebase init failed: %s", e)
-    else:
+    if not (cred_path and Path(cred_path).exists()):
         logging.warning("Firebase disabled (credentials missing).")
-else:
-    logging.warning("FCM disabled (firebase_admin not installed)")
+        return None
+    try:
+        firebase_admin.initialize_app(credentials.Certificate(cred_path))
+        logging.info("Firebase Admin SDK initialized.")
+        return messaging
+    except Exception as e:
+        logging.warning("Firebase init failed: %s", e)
+        return None
+
+def _fcm_messaging():
+    """firebase_admin'i ilk push'ta yükler; kullanılamıyorsa None döner."""
+    global _fcm_loaded, _fcm_module
+    if not _fcm_loaded:
+        with _fcm_lock:
+            if not _fcm_loaded:
+                _fcm_module = _init_fcm()
+                _fcm_loaded = True
+    return _fcm_module
 
 # --------------------------------------------------------------------------------
 # Auth
@@ -97,6 +392,23 @@ else:
 JWT_ALG = "HS256"
 auth_scheme = HTTPBearer()
 
+_PW_HASH_SECONDS = PASSWORD_HASH_SECONDS.labels("hash")
+_PW_VERIFY_SECONDS = PASSWORD_HASH_SECONDS.labels("verify")
+
+def _hash_password(password: str) -> str:
+    t = time.perf_counter()
+    try:
+        return bcrypt.hash(password)
+    finally:
+        _PW_HASH_SECONDS.observe(time.perf_counter() - t)
+
+def _verify_password(password: str, password_hash: str) -> bool:
+    t = time.perf_counter()
+    try:
+        return bcrypt.verify(password, password_hash)
+    finally:
+        _PW_VERIFY_SECONDS.observe(time.perf_counter() - t)
+
 # --------------------------------------------------------------------------------
 # Enums
 # --------------------------------------------------------------------------------
@@ -149,6 +461,13 @@ class Vehicle(Base):
     last_location_lng = Column(Float, nullable=False)
     last_location_updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
+    @property
+    def image_thumb_url(self) -> Optional[str]:
+        # sadece /upload ile yüklenmiş (içerik adresli) görseller için küçük boyut üretilebilir
+        if self.image_url and _IMAGE_URL_RE.search(self.image_url):
+            return f"{self.image_url}?w={THUMB_WIDTH}"
+        return None
+
 class VehicleBlockout(Base):
     __tablename__ = "vehicle_blockouts"
     id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -181,11 +500,11 @@ class DeviceToken(Base):
     __table_args__ = (UniqueConstraint('user_id', 'token', name='uq_user_token'),)
 
 # --------------------------------------------------------------------------------
-# Bootstrap / DDL
+# Bootstrap / DDL (python app.py migrate)
 # --------------------------------------------------------------------------------
-def bootstrap():
-    Base.metadata.create_all(engine)
-    ddl = """
+MIGRATE_LOCK_ID = 0x59414C54  # "YALT"; eşzamanlı migrate çalıştırmalarını sıraya sokar
+
+BOOTSTRAP_DDL = """
     DO $$
     BEGIN
       PERFORM 1 FROM pg_extension WHERE extname='pgcrypto';
@@ -194,6 +513,8 @@ def bootstrap():
           CREATE EXTENSION pgcrypto;
         EXCEPTION WHEN insufficient_privilege THEN
           RAISE NOTICE 'Need superuser to CREATE EXTENSION pgcrypto';
+        WHEN feature_not_supported OR undefined_file THEN
+          RAISE NOTICE 'Extension pgcrypto is not installed on this server';
         END;
       END IF;
 
@@ -203,6 +524,8 @@ def bootstrap():
           CREATE EXTENSION btree_gist;
         EXCEPTION WHEN insufficient_privilege THEN
           RAISE NOTICE 'Need superuser to CREATE EXTENSION btree_gist';
+        WHEN feature_not_supported OR undefined_file THEN
+          RAISE NOTICE 'Extension btree_gist is not installed on this server';
         END;
       END IF;
 
@@ -221,11 +544,15 @@ def bootstrap():
       END IF;
     END$$;
     """
-    with engine.connect() as conn:
-        conn.execute(text(ddl))
-        conn.commit()
 
-bootstrap()
+def bootstrap():
+    """Şema, eklentiler, exclusion constraint ve admin seed; tek transaction ve advisory lock altında."""
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": MIGRATE_LOCK_ID})
+        Base.metadata.create_all(conn)
+        conn.execute(text(BOOTSTRAP_DDL))
+        with Session(bind=conn) as db:
+            seed_admin(db)
 
 # Seed admin
 def seed_admin(db: Session):
@@ -234,13 +561,10 @@ def seed_admin(db: Session):
         u = User(
             email=email,
             full_name="Admin",
-            password_hash=bcrypt.hash("admin123"),
+            password_hash=_hash_password("admin123"),
         )
         db.add(u); db.commit()
 
-with SessionLocal() as db:
-    seed_admin(db)
-
 # --------------------------------------------------------------------------------
 # Schemas (Pydantic)
 # --------------------------------------------------------------------------------
@@ -304,6 +628,7 @@ class VehicleUpdate(BaseModel):
 class VehicleOut(VehicleIn):
     id: uuid.UUID
     status: VehicleStatus = VehicleStatus.active
+    image_thumb_url: Optional[str] = None
     last_location_updated_at: Optional[dt.datetime] = None
     class Config:
         from_attributes = True
@@ -371,12 +696,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# uzun ömürlü akışlar: in-flight ve gecikme metriklerine girmez (süreleri token ömrü kadar)
+_STREAMING_PATHS = frozenset({"/events"})
+
 @app.middleware("http")
 async def log_requests(request, call_next):
-    start = time.time()
-    response = await call_next(request)
-    dur = (time.time() - start) * 1000
-    logging.info("%s %s -> %s (%.1f ms)", request.method, request.url.path, response.status_code, dur)
+    start = time.perf_counter()
+    stats = QueryLog(record=settings.DEBUG)
+    token = _request_db.set(stats)
+    timed = request.url.path not in _STREAMING_PATHS
+    if timed:
+        HTTP_IN_FLIGHT.inc()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        if timed:
+            HTTP_IN_FLIGHT.dec()
+        _request_db.reset(token)
+        dur = time.perf_counter() - start
+        # şablon yol (/vehicles/{vehicle_id}); eşleşmeyenler tek etikette toplanır
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        if timed:
+            HTTP_LATENCY.labels(request.method, route_path, str(status_code)).observe(dur)
+        DB_QUERIES_PER_REQUEST.labels(route_path).observe(stats.count)
+        DB_TIME_PER_REQUEST.labels(route_path).observe(stats.seconds)
+    logging.info("%s %s -> %s (%.1f ms, %d queries, db %.1f ms)", request.method, request.url.path,
+                 status_code, dur * 1000, stats.count, stats.seconds * 1000)
+    if settings.DEBUG:
+        response.headers["Server-Timing"] = (
+            f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", app;dur={dur * 1000:.1f}'
+        )
+        repeated = [g for g in stats.grouped() if g[1] >= settings.N_PLUS_ONE_THRESHOLD]
+        if repeated:
+            logging.warning("Possible N+1 on %s %s:\n%s", request.method, route_path,
+                            "\n".join(f"  {n}x {sql}" for sql, n, _ in repeated))
     return response
 
 def get_db():
@@ -386,6 +742,31 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """Salt-okunur endpoint'ler: sağlıklı bir replika, yoksa primary.
+
+    Yazma ve yazdıktan hemen sonra okunan akışlar (kendi rezervasyonları, admin listeleri) get_db kullanır.
+    """
+    for i in replica_router.candidates():
+        db = replica_router.sessions[i]()
+        try:
+            db.connection()  # bağlantıyı şimdi al; replika erişilemezse sıradakine geç
+        except DBAPIError as e:
+            db.close()
+            replica_router.mark_down(i, e)
+            continue
+        except PoolTimeoutError:
+            # havuz dolu: replika sağlıklı, sadece meşgul; devre dışı bırakmadan sıradakine geç
+            db.close()
+            logging.warning("Replica %d pool exhausted; falling back", i)
+            continue
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+    yield from get_db()
+
 def create_token(user: User) -> str:
     payload = {
         "sub": str(user.id),
@@ -396,11 +777,7 @@ def create_token(user: User) -> str:
     }
     return jwt.encode(payload, settings.JWT_SECRET, algorithm=JWT_ALG)
 
-def get_current_user(
-    creds: HTTPAuthorizationCredentials = Depends(auth_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    token = creds.credentials
+def _user_from_token(token: str, db: Session) -> User:
     try:
         data = jwt.decode(token, settings.JWT_SECRET, algorithms=[JWT_ALG])
     except JWTError:
@@ -411,6 +788,12 @@ def get_current_user(
         raise HTTPException(status_code=401, detail="User not found or inactive")
     return user
 
+def get_current_user(
+    creds: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    db: Session = Depends(get_db),
+) -> User:
+    return _user_from_token(creds.credentials, db)
+
 def admin_required(user: User = Depends(get_current_user)) -> User:
     # şu an tek User tablosu var; admin check gerekiyorsa role alanını admin yap
     if getattr(user, "role", UserRole.user) != UserRole.admin:
@@ -421,11 +804,13 @@ def admin_required(user: User = Depends(get_current_user)) -> User:
 # FCM helpers
 # --------------------------------------------------------------------------------
 def _fcm_enabled() -> bool:
-    return bool(FCM_READY and messaging)
+    return _fcm_messaging() is not None
 
 def _send_push(tokens: list[str], title: str, body: str, data: Optional[dict] = None):
     if not tokens or not _fcm_enabled():
         return
+    messaging = _fcm_messaging()
+    t = time.perf_counter()
     try:
         msg = messaging.MulticastMessage(
             tokens=tokens,
@@ -433,8 +818,10 @@ def _send_push(tokens: list[str], title: str, body: str, data: Optional[dict] =
             data={k: str(v) for k, v in (data or {}).items()},
         )
         resp = messaging.send_multicast(msg)
+        FCM_SEND_SECONDS.labels("ok").observe(time.perf_counter() - t)
         logging.info("FCM sent: success=%s failure=%s", resp.success_count, resp.failure_count)
     except Exception as e:
+        FCM_SEND_SECONDS.labels("error").observe(time.perf_counter() - t)
         logging.exception("FCM error: %s", e)
 
 def _notify_admins_new_booking(db: Session, booking: Booking):
@@ -462,21 +849,138 @@ def _notify_user_status_change(db: Session, booking: Booking):
         title, body = "Rezervasyon güncellendi", f"Durum: {booking.status.value}"
     _send_push(tokens, title, body, data={"booking_id": booking.id})
 
+# --------------------------------------------------------------------------------
+# Live events (SSE)
+# --------------------------------------------------------------------------------
+# audience: None -> herkes, user_id -> sahibi + adminler, EVENTS_ADMINS -> sadece adminler
+EVENTS_ADMINS = "admins"
+
+class _Subscriber:
+    __slots__ = ("user_id", "is_admin", "queue")
+
+    def __init__(self, user_id: uuid.UUID, is_admin: bool, maxsize: int):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def sees(self, audience) -> bool:
+        return audience is None or self.is_admin or audience == self.user_id
+
+class EventHub:
+    """Süreç içi fan-out. Handler'lar (threadpool) publish eder, abonelere event loop üzerinden dağıtılır.
+
+    Olay id'leri `<epoch>:<seq>` biçimindedir; farklı bir süreçten/yeniden başlatmadan gelen
+    Last-Event-ID için `reset` olayı gönderilir ve istemci tam listeyi yeniden çeker.
+    """
+
+    def __init__(self, queue_size: int, backlog: int):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._queue_size = queue_size
+        self._seq = 0
+        self._backlog: deque = deque(maxlen=backlog)  # (seq, audience, frame)
+        self._lock = threading.Lock()
+        self._subs: set = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def publish(self, kind: str, data: dict, audience=None):
+        payload = json.dumps(data, default=str, separators=(",", ":"))
+        with self._lock:
+            self._seq += 1
+            ev = (self._seq, audience, f"id: {self.epoch}:{self._seq}\nevent: {kind}\ndata: {payload}\n\n")
+            self._backlog.append(ev)
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._fanout, ev)
+
+    def _fanout(self, ev):
+        overflowed = None
+        for sub in self._subs:
+            if not sub.sees(ev[1]):
+                continue
+            try:
+                sub.queue.put_nowait(ev)
+            except asyncio.QueueFull:
+                overflowed = overflowed or []
+                overflowed.append(sub)
+        for sub in overflowed or ():
+            # yetişemeyen abone: kuyruğu boşalt ve akışı kapat; istemci Last-Event-ID ile devam eder
+            self._subs.discard(sub)
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+            sub.queue.put_nowait(None)
+
+    def subscribe(self, user_id: uuid.UUID, is_admin: bool, last_event_id: Optional[str]):
+        """Aboneyi kaydeder; (abone, tekrar gönderilecek olaylar, reset gerekli mi) döner."""
+        self._loop = asyncio.get_running_loop()
+        sub = _Subscriber(user_id, is_admin, self._queue_size)
+        self._subs.add(sub)
+        if not last_event_id:
+            return sub, [], False
+        epoch, _, seq = last_event_id.partition(":")
+        with self._lock:
+            backlog = list(self._backlog)
+        if epoch != self.epoch or not seq.isdigit():
+            return sub, [], True
+        after = int(seq)
+        if backlog and backlog[0][0] > after + 1:
+            return sub, [], True  # aradaki olaylar backlog'dan düşmüş
+        return sub, [ev for ev in backlog if ev[0] > after and sub.sees(ev[1])], False
+
+    def unsubscribe(self, sub: _Subscriber):
+        self._subs.discard(sub)
+
+    def reset_frame(self) -> str:
+        with self._lock:
+            return f"id: {self.epoch}:{self._seq}\nevent: reset\ndata: {{}}\n\n"
+
+event_hub = EventHub(settings.EVENTS_QUEUE_SIZE, settings.EVENTS_BACKLOG)
+
+def _publish_vehicle(kind: str, data: dict):
+    event_hub.publish(kind, data)
+
+def _publish_booking(kind: str, b: Booking):
+    event_hub.publish(kind, {
+        "id": b.id, "vehicle_id": b.vehicle_id, "user_id": b.user_id, "status": b.status.value,
+        "starts_at": b.starts_at.isoformat(), "ends_at": b.ends_at.isoformat(),
+    }, audience=b.user_id)
+    # diğer kullanıcıların takvimi için kimlik içermeyen özet
+    _publish_availability(b.vehicle_id, b.starts_at, b.ends_at)
+
+def _blockout_event(bo: VehicleBlockout) -> dict:
+    return {
+        "id": bo.id, "vehicle_id": bo.vehicle_id, "reason": bo.reason,
+        "starts_at": bo.starts_at, "ends_at": bo.ends_at,
+    }
+
+def _publish_blockout(kind: str, data: dict):
+    event_hub.publish(kind, {**data, "starts_at": data["starts_at"].isoformat(),
+                             "ends_at": data["ends_at"].isoformat()}, audience=EVENTS_ADMINS)
+    _publish_availability(data["vehicle_id"], data["starts_at"], data["ends_at"])
+
+def _publish_availability(vehicle_id: uuid.UUID, s: dt.datetime, e: dt.datetime):
+    event_hub.publish("availability.changed", {
+        "vehicle_id": vehicle_id, "starts_at": s.isoformat(), "ends_at": e.isoformat(),
+    })
+
 # --------------------------------------------------------------------------------
 # Utils
 # --------------------------------------------------------------------------------
 def _ensure_utc(d: dt.datetime) -> dt.datetime:
     return d if d.tzinfo else d.replace(tzinfo=dt.timezone.utc)
 
+def _utc_naive(d: dt.datetime) -> dt.datetime:
+    # bookings.time_range TSRANGE (saat dilimsiz); sınırlar UTC duvar saati olarak tutulur
+    return _ensure_utc(d).astimezone(dt.timezone.utc).replace(tzinfo=None)
+
 def _has_conflict(db: Session, vehicle_id: uuid.UUID, s: dt.datetime, e: dt.datetime) -> bool:
     row = db.execute(text("""
       SELECT 1
       FROM bookings
       WHERE vehicle_id = :vid
         AND status IN ('pending','approved')
-        AND time_range && tstzrange(:s, :e, '[)')
+        AND time_range && tsrange(:s, :e, '[)')
       LIMIT 1
-    """), {"vid": str(vehicle_id), "s": s, "e": e}).first()
+    """), {"vid": str(vehicle_id), "s": _utc_naive(s), "e": _utc_naive(e)}).first()
     if row:
         return True
     row2 = db.execute(text("""
@@ -495,6 +999,55 @@ def _has_conflict(db: Session, vehicle_id: uuid.UUID, s: dt.datetime, e: dt.date
 def health():
     return {"ok": True}
 
+# --------------------------------------------------------------------------------
+# Sampling profiler (staging; PROFILER_ENABLED)
+# --------------------------------------------------------------------------------
+_profiler_lock = threading.Lock()
+
+def _sample_stacks(seconds: float, interval: float) -> Counter:
+    """Tüm thread'lerin yığınlarını örnekler; flamegraph.pl/speedscope için 'folded' sayımlar."""
+    me = threading.get_ident()
+    counts: Counter = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for tid, frame in sys._current_frames().items():
+            if tid == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return counts
+
+@app.get("/debug/profile", include_in_schema=False)
+def debug_profile(seconds: float = 10.0, interval_ms: float = 5.0, current: User = Depends(admin_required)):
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(404, "Not found")
+    if not (0 < seconds <= 60) or not (1 <= interval_ms <= 1000):
+        raise HTTPException(400, "seconds must be in (0, 60], interval_ms in [1, 1000]")
+    if not _profiler_lock.acquire(blocking=False):
+        raise HTTPException(409, "Profiler already running")
+    try:
+        counts = _sample_stacks(seconds, interval_ms / 1000)
+    finally:
+        _profiler_lock.release()
+    return PlainTextResponse("\n".join(f"{stack} {n}" for stack, n in counts.most_common()))
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    if prom is None:
+        raise HTTPException(404, "prometheus_client not installed")
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = prom.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prom.REGISTRY
+    return Response(prom.generate_latest(registry), media_type=prom.CONTENT_TYPE_LATEST)
+
 # --------------------------------------------------------------------------------
 # Auth / Users
 # --------------------------------------------------------------------------------
@@ -502,7 +1055,7 @@ def health():
 def register(data: UserCreate, db: Session = Depends(get_db)):
     if db.query(User).filter(User.email == data.email).first():
         raise HTTPException(400, "Email already registered")
-    hashed = bcrypt.hash(data.password)
+    hashed = _hash_password(data.password)
     u = User(email=data.email, password_hash=hashed, full_name=data.full_name)
     db.add(u); db.commit(); db.refresh(u)
     return u
@@ -511,7 +1064,7 @@ def register(data: UserCreate, db: Session = Depends(get_db)):
 def login(data: LoginIn, db: Session = Depends(get_db)):
     logging.info("Login attempt: %s", data.email)
     user = db.query(User).filter(User.email == data.email).first()
-    if not user or not bcrypt.verify(data.password, user.password_hash):
+    if not user or not _verify_password(data.password, user.password_hash):
         logging.warning("Invalid credentials for %s", data.email)
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token = create_token(user)
@@ -534,7 +1087,7 @@ def update_me(data: UserUpdate, current: User = Depends(get_current_user), db: S
     if data.email is not None:
         current.email = data.email.strip()
     if data.password:
-        current.password_hash = bcrypt.hash(data.password)
+        current.password_hash = _hash_password(data.password)
 
     db.commit(); db.refresh(current)
     return current
@@ -566,11 +1119,11 @@ def unregister_device(data: DeviceIn, current: User = Depends(get_current_user),
 # Vehicles
 # --------------------------------------------------------------------------------
 @app.get("/vehicles", response_model=List[VehicleOut])
-def list_vehicles(db: Session = Depends(get_db)):
+def list_vehicles(db: Session = Depends(get_read_db)):
     return db.query(Vehicle).order_by(Vehicle.brand, Vehicle.model).all()
 
 @app.get("/vehicles/{vehicle_id}", response_model=VehicleOut)
-def get_vehicle(vehicle_id: uuid.UUID, db: Session = Depends(get_db)):
+def get_vehicle(vehicle_id: uuid.UUID, db: Session = Depends(get_read_db)):
     v = db.get(Vehicle, vehicle_id)
     if not v:
         raise HTTPException(404, "Vehicle not found")
@@ -580,6 +1133,7 @@ def get_vehicle(vehicle_id: uuid.UUID, db: Session = Depends(get_db)):
 def create_vehicle(data: VehicleIn, current: User = Depends(admin_required), db: Session = Depends(get_db)):
     v = Vehicle(**data.dict())
     db.add(v); db.commit(); db.refresh(v)
+    _publish_vehicle("vehicle.created", VehicleOut.model_validate(v).model_dump(mode="json"))
     return v
 
 @app.put("/vehicles/{vehicle_id}", response_model=VehicleOut)
@@ -593,6 +1147,12 @@ def update_vehicle(vehicle_id: uuid.UUID, data: VehicleUpdate, current: User = D
     if any(k in payload for k in ("last_location_name", "last_location_lat", "last_location_lng")):
         v.last_location_updated_at = func.now()
     db.commit(); db.refresh(v)
+    # vehicle.created ile aynı JSON biçimi (ISO tarih, enum değeri); yalnızca değişen alanlar
+    full = VehicleOut.model_validate(v).model_dump(mode="json")
+    keys = ["id", *payload]
+    if "last_location_name" in payload or "last_location_lat" in payload or "last_location_lng" in payload:
+        keys.append("last_location_updated_at")
+    _publish_vehicle("vehicle.updated", {k: full[k] for k in keys if k in full})
     return v
 
 @app.delete("/vehicles/{vehicle_id}")
@@ -601,11 +1161,12 @@ def delete_vehicle(vehicle_id: uuid.UUID, current: User = Depends(admin_required
     if not v:
         raise HTTPException(404, "Vehicle not found")
     db.delete(v); db.commit()
+    _publish_vehicle("vehicle.deleted", {"id": vehicle_id})
     return {"deleted": True}
 
 # Takvim (araç için, ay bazlı)
 @app.get("/vehicles/{vehicle_id}/calendar")
-def vehicle_calendar(vehicle_id: uuid.UUID, month: str, db: Session = Depends(get_db)):
+def vehicle_calendar(vehicle_id: uuid.UUID, month: str, db: Session = Depends(get_read_db)):
     try:
         year_str, month_str = month.split("-")
         year = int(year_str); mon = int(month_str)
@@ -646,26 +1207,266 @@ def vehicle_calendar(vehicle_id: uuid.UUID, month: str, db: Session = Depends(ge
 # --------------------------------------------------------------------------------
 # Upload
 # --------------------------------------------------------------------------------
+UPLOAD_CHUNK = 1024 * 1024  # diske en az bu kadar biriktirip yazılır
+UPLOAD_MULTIPART_OVERHEAD = 64 * 1024  # sınır satırları + part başlıkları için pay
+_IMAGE_NAME_RE = re.compile(r"^([0-9a-f]{64})\.(jpg|png|webp|gif)$")
+_IMAGE_MEDIA = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
+_IMMUTABLE = "public, max-age=31536000, immutable"
+
+_image_lock = threading.RLock()
+_image_executor: Optional[ThreadPoolExecutor] = None
+_variant_jobs: dict = {}
+_pil_loaded = False
+_pil_modules = None
+
+def _pil():
+    """Pillow'u ilk kullanımda yükler; kurulu değilse None döner."""
+    global _pil_loaded, _pil_modules
+    if not _pil_loaded:
+        try:
+            from PIL import Image, ImageOps
+            _pil_modules = (Image, ImageOps)
+        except Exception:
+            logging.warning("Image variants disabled (Pillow not installed)")
+        _pil_loaded = True
+    return _pil_modules
+
+def _sniff_image(head: bytes) -> Optional[str]:
+    # dosya adındaki uzantıya değil içeriğin kendisine bak
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    return None
+
+def _write_chunk(fh, h, chunk: bytes):
+    h.update(chunk)
+    fh.write(chunk)
+
+def _store_upload(tmp: Path, dest: Path):
+    if dest.exists():
+        tmp.unlink()  # aynı içerik zaten var
+    else:
+        os.replace(tmp, dest)
+
+def _image_pool() -> ThreadPoolExecutor:
+    # Pillow resize/encode sırasında GIL'i bırakır; thread havuzu yeterli
+    global _image_executor
+    with _image_lock:
+        if _image_executor is None:
+            _image_executor = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS, thread_name_prefix="img")
+        return _image_executor
+
+def _check_image(path: Path):
+    """Yüklenen dosyanın gerçekten çözülebildiğini ve piksel sınırı içinde olduğunu doğrular."""
+    Image, _ = _pil()
+    try:
+        with Image.open(path) as im:
+            w, h = im.size
+            if w * h > settings.IMAGE_MAX_PIXELS:
+                raise HTTPException(413, f"Görsel çok büyük ({w}x{h} piksel)")
+            im.verify()
+        with Image.open(path) as im:
+            im.load()  # verify() kesik JPEG'leri yakalamaz; tam çözümle
+    except Image.DecompressionBombError:
+        raise HTTPException(413, "Görsel çok büyük")
+    except (OSError, SyntaxError, ValueError):  # UnidentifiedImageError bir OSError
+        raise HTTPException(415, "Görsel çözülemedi (bozuk veya desteklenmeyen dosya)")
+
+def _render_variant(src: Path, out: Path, width: int, fmt: str) -> Path:
+    Image, ImageOps = _pil()
+    tmp = out.with_name(f"{out.name}.{uuid.uuid4().hex}.tmp")
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        if fmt == "jpg" and im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        im.thumbnail((width, width * 4))  # oranı korur, büyütmez
+        if fmt == "webp":
+            im.save(tmp, format="WEBP", quality=80, method=4)
+        else:
+            im.save(tmp, format="JPEG", quality=80, optimize=True)
+    os.replace(tmp, out)
+    return out
+
+def _variant_future(name: str, width: int, fmt: str) -> Future:
+    """Aynı varyant için eşzamanlı istekler tek bir üretim işini paylaşır."""
+    out = VARIANT_DIR / f"{name.split('.')[0]}_w{width}.{fmt}"
+    with _image_lock:
+        fut = _variant_jobs.get(out)
+        if fut is None:
+            fut = _image_pool().submit(_render_variant, UPLOAD_DIR / name, out, width, fmt)
+            _variant_jobs[out] = fut
+            fut.add_done_callback(lambda f: _variant_done(out, f))
+        return fut
+
+def _variant_done(out: Path, fut: Future):
+    _variant_jobs.pop(out, None)
+    if fut.exception() is not None:
+        logging.warning("Image variant %s failed: %r", out.name, fut.exception())
+
+class _ImageUpload:
+    """Multipart gövdesini akış hâlinde ayrıştırır; 'file' parçası hash'lenerek doğrudan
+    UPLOAD_TMP_DIR'e yazılır (ara SpooledTemporaryFile ve ikinci kopya yok)."""
+
+    def __init__(self, tmp: Path):
+        self.tmp = tmp
+        self.hash = hashlib.sha256()
+        self.size = 0
+        self.ext: Optional[str] = None
+        self.found = False
+        self._fh = None
+        self._pending = bytearray()
+        self._in_file = False
+        self._header_name = self._header_value = self._disposition = b""
+
+    # --- MultipartParser geri çağrıları (senkron; disk işi flush()'ta) ---
+    def on_part_begin(self):
+        self._in_file = False
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if options.get(b"name") == b"file" and b"filename" in options:
+            if self.found:
+                raise HTTPException(400, "Tek dosya yüklenebilir")
+            self.found = self._in_file = True
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if not self._in_file:
+            return  # diğer alanlar kullanılmıyor; belleğe alınmaz
+        self.size += end - start
+        if self.size > settings.UPLOAD_MAX_BYTES:
+            raise HTTPException(413, f"Dosya çok büyük (en fazla {settings.UPLOAD_MAX_BYTES} bayt)")
+        self._pending += data[start:end]
+
+    def on_part_end(self):
+        self._in_file = False
+
+    async def feed(self, headers, stream):
+        _, params = parse_options_header(headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if boundary is None:
+            raise HTTPException(400, "multipart/form-data gövdesi bekleniyor")
+        callbacks = {name: getattr(self, name) for name in (
+            "on_part_begin", "on_header_field", "on_header_value", "on_header_end",
+            "on_headers_finished", "on_part_data", "on_part_end")}
+        parser = MultipartParser(boundary, callbacks)
+        try:
+            async for chunk in stream:
+                parser.write(chunk)
+                if len(self._pending) >= UPLOAD_CHUNK:
+                    await self.flush()
+            parser.finalize()
+        except FormParserError:
+            raise HTTPException(400, "Geçersiz multipart gövdesi")
+        await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        data = bytes(self._pending)
+        self._pending.clear()
+        if self.ext is None:
+            self.ext = _sniff_image(data[:16])
+            if self.ext is None:
+                raise HTTPException(415, "Desteklenmeyen görsel türü (jpg, png, webp, gif)")
+        if self._fh is None:
+            self._fh = await run_in_threadpool(self.tmp.open, "wb")
+        await run_in_threadpool(_write_chunk, self._fh, self.hash, data)
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+
 @app.post("/upload")
-async def upload_image(file: UploadFile = File(...), request: Request = None):
-    ext = Path(file.filename).suffix.lower()
-    fname = f"{uuid.uuid4()}{ext}"
-    dest = UPLOAD_DIR / fname
-    with dest.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+async def upload_image(request: Request):
+    # Gövde, ayrıştırılmadan önce boyutuyla reddedilir; sonra request.stream() doğrudan
+    # ayrıştırıcıya verilir, bu yüzden `file: UploadFile = File(...)` / request.form() kullanılmaz.
+    length = request.headers.get("content-length")
+    if length is None or not length.isdigit():
+        raise HTTPException(411, "Content-Length gerekli")
+    if int(length) > settings.UPLOAD_MAX_BYTES + UPLOAD_MULTIPART_OVERHEAD:
+        raise HTTPException(413, f"Dosya çok büyük (en fazla {settings.UPLOAD_MAX_BYTES} bayt)")
+    name = await _store_image(request)
+
+    if _pil() is not None:
+        _variant_future(name, THUMB_WIDTH, "webp")  # liste görünümü için önceden üret
     base = str(request.base_url).rstrip("/")
-    return {"url": f"{base}/static/uploads/{fname}"}
+    return {"url": f"{base}/images/{name}", "thumb_url": f"{base}/images/{name}?w={THUMB_WIDTH}"}
+
+async def _store_image(request: Request) -> str:
+    """'file' parçasını akıtarak hash'ler, doğrular ve içerik adresli olarak saklar."""
+    tmp = UPLOAD_TMP_DIR / uuid.uuid4().hex
+    upload = _ImageUpload(tmp)
+    try:
+        await upload.feed(request.headers, request.stream())
+        if not upload.found:
+            raise HTTPException(422, "'file' alanı gerekli")
+        if upload.ext is None:
+            raise HTTPException(400, "Boş dosya")
+        await run_in_threadpool(upload.close)
+        if _pil() is not None:
+            await asyncio.wrap_future(_image_pool().submit(_check_image, tmp))
+        name = f"{upload.hash.hexdigest()}.{upload.ext}"
+        await run_in_threadpool(_store_upload, tmp, UPLOAD_DIR / name)
+    except BaseException:
+        upload.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    return name
+
+@app.get("/images/{name}")
+async def get_image(name: str, w: Optional[int] = None, fmt: str = "webp"):
+    m = _IMAGE_NAME_RE.match(name)
+    if not m or not (UPLOAD_DIR / name).exists():
+        raise HTTPException(404, "Image not found")
+    digest, ext = m.groups()
+    headers = {"Cache-Control": _IMMUTABLE, "ETag": f'"{digest}-{w or 0}-{fmt}"'}
+    if w is None:
+        return FileResponse(UPLOAD_DIR / name, media_type=_IMAGE_MEDIA[ext], headers=headers)
+    if w not in IMAGE_WIDTHS:
+        raise HTTPException(400, f"w must be one of {IMAGE_WIDTHS}")
+    if fmt not in ("webp", "jpg"):
+        raise HTTPException(400, "fmt must be webp or jpg")
+    if _pil() is None:
+        # Pillow yok: orijinali kısa süreli önbellekle döndür
+        return FileResponse(UPLOAD_DIR / name, media_type=_IMAGE_MEDIA[ext],
+                            headers={"Cache-Control": "public, max-age=3600"})
+    out = VARIANT_DIR / f"{digest}_w{w}.{fmt}"
+    if not out.exists():
+        try:
+            out = await asyncio.wrap_future(_variant_future(name, w, fmt))
+        except Exception:
+            # üretilemedi (hata _variant_done'da loglanır): orijinali, kalıcı önbelleğe almadan döndür
+            return FileResponse(UPLOAD_DIR / name, media_type=_IMAGE_MEDIA[ext],
+                                headers={"Cache-Control": "public, max-age=3600"})
+    return FileResponse(out, media_type=_IMAGE_MEDIA[fmt], headers=headers)
 
 # --------------------------------------------------------------------------------
 # Availability / Bookings / Blockouts
 # --------------------------------------------------------------------------------
 @app.get("/availability", response_model=List[VehicleOut])
-def availability(frm: dt.datetime, to: dt.datetime, db: Session = Depends(get_db)):
+def availability(frm: dt.datetime, to: dt.datetime, db: Session = Depends(get_read_db)):
     if to <= frm:
         raise HTTPException(400, "to must be after from")
 
-    frm = frm.replace(tzinfo=None)
-    to = to.replace(tzinfo=None)
+    frm = _utc_naive(frm)
+    to = _utc_naive(to)
 
     conflicts_sql = text("""
         WITH conflicts AS (
@@ -675,14 +1476,14 @@ def availability(frm: dt.datetime, to: dt.datetime, db: Session = Depends(get_db
             UNION
             SELECT vehicle_id
             FROM vehicle_blockouts
-            WHERE tsrange(starts_at, ends_at, '[)') && tsrange(:frm, :to, '[)')
+            WHERE tsrange(starts_at AT TIME ZONE 'UTC', ends_at AT TIME ZONE 'UTC', '[)') && tsrange(:frm, :to, '[)')
         )
         SELECT id FROM vehicles
         WHERE status='active' AND id NOT IN (SELECT vehicle_id FROM conflicts)
     """)
 
-    with db.bind.connect() as conn:
-        rows = conn.execute(conflicts_sql, {"frm": frm, "to": to}).fetchall()
+    # oturumun bağlantısını kullan; ikinci bir havuz checkout'u gerekmez
+    rows = db.execute(conflicts_sql, {"frm": frm, "to": to}).fetchall()
 
     ids = [r[0] for r in rows]
     if not ids:
@@ -698,20 +1499,18 @@ def create_booking(data: BookingIn, current: User = Depends(get_current_user), d
     if _has_conflict(db, data.vehicle_id, s, e):
         raise HTTPException(409, "Çakışan rezervasyon veya blokaj.")
 
-    with db.bind.connect() as conn:
-        tr = conn.execute(text("SELECT tstzrange(:s, :e, '[)')"), {"s": s, "e": e}).scalar()
-
     b = Booking(
         user_id=current.id,
         vehicle_id=data.vehicle_id,
         starts_at=s,
         ends_at=e,
-        time_range=tr,
+        time_range=func.tsrange(_utc_naive(s), _utc_naive(e), "[)"),
         purpose=data.purpose,
     )
     db.add(b)
     try:
         db.commit(); db.refresh(b)
+        _publish_booking("booking.created", b)
         _notify_admins_new_booking(db, b)
     except Exception as ex:
         db.rollback()
@@ -738,6 +1537,7 @@ def _set_booking_status(db: Session, bid: uuid.UUID, new_status: BookingStatus)
         raise HTTPException(404, "Booking not found")
     b.status = new_status
     db.commit(); db.refresh(b)
+    _publish_booking("booking.updated", b)
     return b
 
 @app.post("/bookings/{booking_id}/approve", response_model=BookingOut)
@@ -769,6 +1569,7 @@ def create_blockout(data: BlockoutIn, current: User = Depends(admin_required), d
         raise HTTPException(400, "ends_at must be after starts_at")
     bo = VehicleBlockout(**data.dict())
     db.add(bo); db.commit(); db.refresh(bo)
+    _publish_blockout("blockout.created", _blockout_event(bo))
     return bo
 
 @app.get("/vehicle-blockouts", response_model=List[BlockoutOut])
@@ -780,9 +1581,70 @@ def delete_blockout(blockout_id: uuid.UUID, current: User = Depends(admin_requir
     bo = db.get(VehicleBlockout, blockout_id)
     if not bo:
         raise HTTPException(404, "Blockout not found")
+    snapshot = _blockout_event(bo)  # commit sonrası silinen satır okunamaz
     db.delete(bo); db.commit()
+    _publish_blockout("blockout.deleted", snapshot)
     return {"deleted": True}
 
+# --------------------------------------------------------------------------------
+# Live events (SSE) endpoint
+# --------------------------------------------------------------------------------
+async def _event_stream(user_id: uuid.UUID, is_admin: bool, resume: Optional[str], expires_in: float):
+    # token süresi dolunca `reset` ile kapat (istemci yeniden oturum açar); daha önce dolan
+    # EVENTS_REAUTH_SECONDS'ta sessizce kapat, istemci Last-Event-ID ile yeniden bağlanır
+    token_expires = expires_in <= settings.EVENTS_REAUTH_SECONDS
+    deadline = time.monotonic() + min(expires_in, settings.EVENTS_REAUTH_SECONDS)
+    sub, replay, reset = event_hub.subscribe(user_id, is_admin, resume)
+    try:
+        yield "retry: 3000\n\n"
+        if reset:
+            yield event_hub.reset_frame()
+        last = 0
+        for seq, _, frame in replay:
+            last = seq
+            yield frame
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if token_expires:
+                    yield event_hub.reset_frame()
+                break
+            try:
+                ev = await asyncio.wait_for(sub.queue.get(), min(settings.EVENTS_HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                if deadline - time.monotonic() > 0:
+                    yield ": ping\n\n"
+                continue
+            if ev is None:
+                break
+            if ev[0] <= last:
+                continue  # replay ile zaten gönderildi
+            yield ev[2]
+    finally:
+        event_hub.unsubscribe(sub)
+
+@app.get("/events")
+async def events(
+    request: Request,
+    last_event_id: Optional[str] = None,
+    creds: HTTPAuthorizationCredentials = Depends(auth_scheme),
+):
+    # uzun ömürlü bağlantı boyunca DB oturumu tutmamak için kullanıcıyı kısa bir oturumla çöz
+    def _load():
+        with SessionLocal() as db:
+            u = _user_from_token(creds.credentials, db)
+            return u.id, getattr(u, "role", UserRole.user) == UserRole.admin
+    user_id, is_admin = await run_in_threadpool(_load)
+    # imza _user_from_token'da doğrulandı; burada sadece exp okunur
+    exp = jwt.get_unverified_claims(creds.credentials).get("exp")
+    expires_in = exp - time.time() if exp else settings.EVENTS_REAUTH_SECONDS
+    resume = request.headers.get("last-event-id") or last_event_id
+    return StreamingResponse(
+        _event_stream(user_id, is_admin, resume, expires_in),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/admin/bookings", response_model=List[BookingWithNamesOut])
 def admin_bookings(current: User = Depends(admin_required), db: Session = Depends(get_db)):
     rows = (
@@ -822,3 +1684,41 @@ def vehicles_in_use(current: User = Depends(admin_required), db: Session = Depen
         "vehicle": {"id": v.id, "plate": v.plate, "brand": v.brand, "model": v.model},
     } for b, u, v in rows]
 
+# --------------------------------------------------------------------------------
+# CLI: python app.py migrate | python app.py startup-check [--budget-ms N]
+# --------------------------------------------------------------------------------
+_STARTUP_PROBE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+async def _probe():
+    async with app.app.router.lifespan_context(app.app):
+        return time.perf_counter()
+t2 = asyncio.run(_probe())
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "lifespan_ms": (t2 - t1) * 1000}))
+"""
+
+def _startup_check(budget_ms: int) -> int:
+    """Temiz bir süreçte import + lifespan süresini ölçer; bütçe aşılırsa 1 döner."""
+    proc = subprocess.run([sys.executable, "-c", _STARTUP_PROBE], cwd=BASE_DIR,
+                          capture_output=True, text=True, check=True)
+    res = json.loads(proc.stdout.strip().splitlines()[-1])
+    res["total_ms"] = res["import_ms"] + res["lifespan_ms"]
+    res["budget_ms"] = budget_ms
+    print(json.dumps(res))
+    return 0 if res["total_ms"] <= budget_ms else 1
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="YALTES Car API yönetim komutları")
+    cmds = parser.add_subparsers(dest="cmd", required=True)
+    cmds.add_parser("migrate", help="şema/DDL oluştur ve admin kullanıcısını ekle")
+    check = cmds.add_parser("startup-check", help="soğuk başlatma süresini bütçeyle karşılaştır")
+    check.add_argument("--budget-ms", type=int, default=settings.STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+    if args.cmd == "migrate":
+        bootstrap()
+        logging.info("Migration complete.")
+    else:
+        sys.exit(_startup_check(args.budget_ms))
@@ -0,0 +1,8 @@
+"""YALTES Car API yük testi / benchmark paketi.
+
+    python -m bench seed --vehicles 5000 --bookings 1000000
+    python -m bench run --target asgi --out results.json
+    python -m bench compare base.json results.json --threshold 0.10
+
+Veritabanı `DATABASE_URL` ile seçilir (app.py ile aynı ayar); yerel bir Postgres kullanın.
+"""
@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from .report import ERROR_RATE_TOLERANCE, build_report, compare, load_report, write_report
+
+DEFAULT_SCENARIOS = "login,availability,contention,admin,calendar,mix"
+
+
+async def _run(args) -> dict:
+    from .workload import SCENARIOS, open_client, run_scenario, setup
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n != "mix" and n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(unknown)}")
+    results = {}
+    async with open_client(args.target, args.concurrency) as client:
+        ctx = await setup(client, args.users)
+        if args.warmup > 0:
+            await run_scenario(client, ctx, "mix", args.concurrency, args.warmup, args.seed)
+        for name in names:
+            logging.info("running %s (%d workers, %.0f s)", name, args.concurrency, args.duration)
+            results[name] = await run_scenario(client, ctx, name, args.concurrency, args.duration, args.seed)
+            logging.info("%s: %s", name, json.dumps({k: v for k, v in results[name].items() if k != "statuses"}))
+    return results
+
+
+def _report_regressions(base: dict, new: dict, threshold: float, error_tolerance: float) -> int:
+    regressions = compare(base, new, threshold, error_tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r}")
+    if not regressions:
+        print(f"no regressions beyond {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="YALTES Car API benchmark")
+    cmds = parser.add_subparsers(dest="cmd", required=True)
+
+    p = cmds.add_parser("seed", help="sentetik veri üret (DATABASE_URL)")
+    p.add_argument("--vehicles", type=int, default=5000)
+    p.add_argument("--bookings", type=int, default=1_000_000)
+    p.add_argument("--users", type=int, default=2000)
+    p.add_argument("--reset", action="store_true", help="önceki bench verisini sil")
+
+    p = cmds.add_parser("run", help="senaryoları çalıştır ve JSON rapor yaz")
+    p.add_argument("--target", default="asgi", help="'asgi' (in-process) veya http://host:port")
+    p.add_argument("--scenarios", default=DEFAULT_SCENARIOS)
+    p.add_argument("--concurrency", type=int, default=32)
+    p.add_argument("--duration", type=float, default=30.0, help="senaryo başına saniye")
+    p.add_argument("--warmup", type=float, default=5.0)
+    p.add_argument("--users", type=int, default=64, help="oturum açılacak bench kullanıcısı sayısı")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--out", default="bench-results.json")
+    p.add_argument("--baseline", help="karşılaştırılacak önceki rapor")
+    p.add_argument("--threshold", type=float, default=0.10, help="göreli eşik (throughput, p50/p99)")
+    p.add_argument("--error-tolerance", type=float, default=ERROR_RATE_TOLERANCE, help="mutlak hata oranı payı")
+
+    p = cmds.add_parser("compare", help="iki raporu karşılaştır; gerileme varsa 1 ile çık")
+    p.add_argument("base")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.10, help="göreli eşik (throughput, p50/p99)")
+    p.add_argument("--error-tolerance", type=float, default=ERROR_RATE_TOLERANCE, help="mutlak hata oranı payı")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # istek başına INFO satırı ölçümü boğar
+
+    if args.cmd == "seed":
+        from .seed import seed
+        seed(args.vehicles, args.bookings, args.users, do_reset=args.reset)
+        return 0
+    if args.cmd == "compare":
+        return _report_regressions(load_report(args.base), load_report(args.new), args.threshold, args.error_tolerance)
+
+    config = {k: getattr(args, k) for k in ("target", "concurrency", "duration", "warmup", "users", "seed")}
+    report = build_report(asyncio.run(_run(args)), config)
+    write_report(args.out, report)
+    logging.info("wrote %s", args.out)
+    if args.baseline:
+        return _report_regressions(load_report(args.baseline), report, args.threshold, args.error_tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
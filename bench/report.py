@@ -0,0 +1,86 @@
+"""Gecikme/throughput özetleri, JSON rapor ve commit'ler arası karşılaştırma."""
+import datetime as dt
+import json
+import math
+import platform
+import subprocess
+import sys
+from pathlib import Path
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    # nearest-rank
+    if not sorted_values:
+        return 0.0
+    idx = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def summarize(latencies: list, errors: int, elapsed: float, statuses: dict) -> dict:
+    lat = sorted(latencies)
+    ms = lambda v: round(v * 1000, 2)
+    return {
+        "requests": len(lat),
+        "errors": errors,
+        "error_rate": round(errors / len(lat), 4) if lat else 0.0,
+        "throughput_rps": round(len(lat) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": ms(sum(lat) / len(lat)) if lat else 0.0,
+        "p50_ms": ms(percentile(lat, 50)),
+        "p90_ms": ms(percentile(lat, 90)),
+        "p99_ms": ms(percentile(lat, 99)),
+        "max_ms": ms(lat[-1]) if lat else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+    }
+
+
+def _git(*args: str):
+    try:
+        out = subprocess.run(["git", *args], capture_output=True, text=True, check=True,
+                             cwd=Path(__file__).resolve().parent.parent)
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def build_report(scenarios: dict, config: dict) -> dict:
+    return {
+        "meta": {
+            "commit": _git("rev-parse", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "config": config,
+        "scenarios": scenarios,
+    }
+
+
+def write_report(path: str, report: dict):
+    Path(path).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def load_report(path: str) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+ERROR_RATE_TOLERANCE = 0.005  # mutlak; hata oranı göreli eşikle değil bununla karşılaştırılır
+
+
+def compare(base: dict, new: dict, threshold: float, error_tolerance: float = ERROR_RATE_TOLERANCE) -> list:
+    """Gerilemeleri listeler: göreli `threshold` üstü throughput düşüşü veya p50/p99 artışı,
+    `error_tolerance` üstü (ya da sıfırdan) hata oranı artışı, yeni raporda eksik senaryo."""
+    regressions = []
+    for name, b in base["scenarios"].items():
+        n = new["scenarios"].get(name)
+        if n is None:
+            regressions.append(f"{name}: missing from new report")
+            continue
+        if b["throughput_rps"] > 0 and n["throughput_rps"] < b["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {b['throughput_rps']} -> {n['throughput_rps']} rps")
+        for key in ("p50_ms", "p99_ms"):
+            if b[key] > 0 and n[key] > b[key] * (1 + threshold):
+                regressions.append(f"{name}: {key} {b[key]} -> {n[key]}")
+        if n["error_rate"] > b["error_rate"] + error_tolerance or (b["error_rate"] == 0 and n["error_rate"] > 0):
+            regressions.append(f"{name}: error_rate {b['error_rate']} -> {n['error_rate']}")
+    return regressions
@@ -0,0 +1,110 @@
+"""Sentetik filo, kullanıcı ve rezervasyon geçmişi üretir (tamamı SQL generate_series ile)."""
+import logging
+import time
+
+from sqlalchemy import text
+
+BENCH_PASSWORD = "bench123"
+ADMIN_EMAIL = "bench-admin@bench.local"
+BOOKING_STEP_HOURS = 3   # araç başına ardışık rezervasyonlar; 2 saatlik, çakışmasız
+VEHICLE_BATCH = 500
+
+
+def user_email(i: int) -> str:
+    return f"bench-{i}@bench.local"
+
+
+def reset(conn):
+    # araçlar silinince rezervasyon/blokajlar CASCADE ile gider
+    conn.execute(text("DELETE FROM vehicles WHERE plate LIKE 'BENCH-%'"))
+    conn.execute(text("DELETE FROM users WHERE email LIKE 'bench-%@bench.local'"))
+
+
+def clear_contention(conn, vehicle_id: str, frm, to):
+    """Önceki koşuların sıcak araçta bıraktığı rezervasyonları siler; yoksa her koşu sadece 409 ölçer."""
+    return conn.execute(text("""
+        DELETE FROM bookings
+        WHERE vehicle_id = :vid AND purpose = 'bench' AND starts_at < :to AND ends_at > :frm
+    """), {"vid": vehicle_id, "frm": frm, "to": to}).rowcount
+
+
+def seed_users(conn, n: int, password_hash: str):
+    conn.execute(text("""
+        INSERT INTO users (id, email, password_hash, full_name, role, is_active)
+        SELECT gen_random_uuid(), 'bench-' || i || '@bench.local', :h, 'Bench User ' || i, 'user', true
+        FROM generate_series(1, :n) AS i
+    """), {"n": n, "h": password_hash})
+    conn.execute(text("""
+        INSERT INTO users (id, email, password_hash, full_name, role, is_active)
+        VALUES (gen_random_uuid(), :email, :h, 'Bench Admin', 'admin', true)
+    """), {"email": ADMIN_EMAIL, "h": password_hash})
+
+
+def seed_vehicles(conn, n: int):
+    conn.execute(text("""
+        INSERT INTO vehicles (id, plate, brand, model, color, model_year, seats, fuel_type, transmission,
+                              status, current_odometer, last_location_name, last_location_lat, last_location_lng)
+        SELECT gen_random_uuid(),
+               'BENCH-' || lpad(i::text, 6, '0'),
+               (ARRAY['Renault','Fiat','Toyota','Ford','Hyundai'])[1 + i % 5],
+               (ARRAY['Clio','Egea','Corolla','Focus','i20'])[1 + i % 5],
+               (ARRAY['Beyaz','Siyah','Gri','Kırmızı'])[1 + i % 4],
+               2015 + i % 10, 5,
+               (ARRAY['benzin','dizel','hibrit'])[1 + i % 3],
+               (ARRAY['manuel','otomatik'])[1 + i % 2],
+               (CASE WHEN i % 20 = 0 THEN 'maintenance' ELSE 'active' END)::vehiclestatus,
+               10000 + (i * 7919) % 150000,
+               'Bench Lokasyon ' || (i % 50), 41.0 + (i % 100) / 1000.0, 29.0 + (i % 100) / 1000.0
+        FROM generate_series(1, :n) AS i
+    """), {"n": n})
+
+
+def seed_bookings(conn, vehicles: int, bookings: int):
+    """Araç başına `bookings / vehicles` ardışık rezervasyon; ~%90'ı geçmişte, kalanı gelecekte."""
+    per_vehicle = max(1, bookings // max(1, vehicles))
+    history_hours = int(per_vehicle * BOOKING_STEP_HOURS * 0.9)
+    for lo in range(1, vehicles + 1, VEHICLE_BATCH):
+        hi = min(vehicles, lo + VEHICLE_BATCH - 1)
+        conn.execute(text("""
+            WITH us AS (SELECT array_agg(id ORDER BY email) AS a FROM users WHERE email LIKE 'bench-%@bench.local'),
+                 v AS (SELECT id, substr(plate, 7)::int AS rn FROM vehicles
+                       WHERE plate BETWEEN 'BENCH-' || lpad(CAST(:lo AS text), 6, '0')
+                                     AND 'BENCH-' || lpad(CAST(:hi AS text), 6, '0')),
+                 slots AS (
+                   SELECT v.id AS vehicle_id, v.rn, j,
+                          date_trunc('hour', now()) - make_interval(hours => :history)
+                            + make_interval(hours => j * :step) AS s
+                   FROM v CROSS JOIN generate_series(0, :per - 1) AS j
+                 )
+            INSERT INTO bookings (id, user_id, vehicle_id, starts_at, ends_at, time_range, status, purpose)
+            SELECT gen_random_uuid(),
+                   us.a[1 + (slots.rn * 31 + slots.j) % array_length(us.a, 1)],
+                   slots.vehicle_id, slots.s, slots.s + interval '2 hours',
+                   tsrange((slots.s AT TIME ZONE 'UTC'), (slots.s AT TIME ZONE 'UTC') + interval '2 hours', '[)'),
+                   (CASE WHEN slots.s < now() THEN (CASE WHEN slots.j % 10 = 0 THEN 'canceled' ELSE 'completed' END)
+                         WHEN slots.j % 2 = 0 THEN 'approved' ELSE 'pending' END)::bookingstatus,
+                   'bench'
+            FROM slots, us
+        """), {"lo": lo, "hi": hi, "per": per_vehicle, "history": history_hours, "step": BOOKING_STEP_HOURS})
+        logging.info("bookings: vehicles %d-%d done", lo, hi)
+
+
+def seed(vehicles: int, bookings: int, users: int, do_reset: bool = False):
+    from app import bootstrap, engine, _hash_password
+
+    bootstrap()
+    t = time.perf_counter()
+    password_hash = _hash_password(BENCH_PASSWORD)  # tek hash; tüm bench kullanıcıları aynı şifre
+    with engine.begin() as conn:
+        if do_reset:
+            reset(conn)
+        elif conn.execute(text("SELECT 1 FROM users WHERE email = :e"), {"e": ADMIN_EMAIL}).first():
+            raise SystemExit("bench data already present; use --reset")
+        seed_users(conn, users, password_hash)
+        seed_vehicles(conn, vehicles)
+    with engine.begin() as conn:
+        seed_bookings(conn, vehicles, bookings)
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+    logging.info("seeded %d users, %d vehicles, ~%d bookings in %.1f s",
+                 users, vehicles, bookings, time.perf_counter() - t)
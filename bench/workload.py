@@ -0,0 +1,150 @@
+"""Senaryolar ve eşzamanlı sürücü; hedef in-process ASGI veya çalışan bir HTTP sunucusu."""
+import asyncio
+import datetime as dt
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+
+import httpx
+
+from .report import summarize
+from .seed import ADMIN_EMAIL, BENCH_PASSWORD, clear_contention, user_email
+
+CONTENTION_SLOTS = 16  # aynı araç için yarışılan pencere sayısı
+
+
+class Context:
+    def __init__(self, tokens: list, admin_token: str, vehicle_ids: list):
+        self.tokens = tokens
+        self.admin_token = admin_token
+        self.vehicle_ids = vehicle_ids
+        self.hot_vehicle = vehicle_ids[0]
+        # yarışma pencereleri uzak gelecekte; seed edilmiş geçmişle çakışmaz
+        base = dt.datetime.now(dt.timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        base += dt.timedelta(days=400)
+        self.contention_windows = [
+            (base + dt.timedelta(hours=3 * k), base + dt.timedelta(hours=3 * k + 2)) for k in range(CONTENTION_SLOTS)
+        ]
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def _login(client: httpx.AsyncClient, email: str) -> str:
+    r = await client.post("/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def setup(client: httpx.AsyncClient, users: int) -> Context:
+    admin_token = await _login(client, ADMIN_EMAIL)
+    tokens = await asyncio.gather(*(_login(client, user_email(i)) for i in range(1, users + 1)))
+    r = await client.get("/vehicles")
+    r.raise_for_status()
+    vehicle_ids = [v["id"] for v in r.json() if v["status"] == "active" and v["plate"].startswith("BENCH-")]
+    if not vehicle_ids:
+        raise SystemExit("no bench vehicles found; run `python -m bench seed` first")
+    ctx = Context(list(tokens), admin_token, vehicle_ids)
+    await asyncio.to_thread(_reset_contention, ctx)
+    return ctx
+
+
+def _reset_contention(ctx: Context):
+    # sunucu hedefte de aynı DATABASE_URL'e bağlanılır (seed ile aynı)
+    from app import engine
+
+    with engine.begin() as conn:
+        n = clear_contention(conn, ctx.hot_vehicle, ctx.contention_windows[0][0], ctx.contention_windows[-1][1])
+    if n:
+        logging.info("cleared %d bookings left in the contention windows", n)
+
+
+# ----------------------------- senaryolar -----------------------------
+async def login(client, ctx: Context, rng: random.Random):
+    i = rng.randint(1, len(ctx.tokens))
+    return await client.post("/auth/login", json={"email": user_email(i), "password": BENCH_PASSWORD})
+
+
+async def availability(client, ctx: Context, rng: random.Random):
+    frm = dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=rng.randint(0, 30 * 24))
+    to = frm + dt.timedelta(hours=rng.randint(2, 72))
+    return await client.get("/availability", params={"frm": frm.isoformat(), "to": to.isoformat()})
+
+
+async def contention(client, ctx: Context, rng: random.Random):
+    s, e = rng.choice(ctx.contention_windows)
+    return await client.post("/bookings", headers=_auth(rng.choice(ctx.tokens)), json={
+        "vehicle_id": ctx.hot_vehicle, "starts_at": s.isoformat(), "ends_at": e.isoformat(), "purpose": "bench",
+    })
+
+
+async def admin_listing(client, ctx: Context, rng: random.Random):
+    path = "/admin/inuse" if rng.random() < 0.5 else "/vehicle-blockouts"
+    return await client.get(path, headers=_auth(ctx.admin_token))
+
+
+async def calendar(client, ctx: Context, rng: random.Random):
+    month = (dt.date.today() - dt.timedelta(days=30 * rng.randint(0, 12))).strftime("%Y-%m")
+    return await client.get(f"/vehicles/{rng.choice(ctx.vehicle_ids)}/calendar", params={"month": month})
+
+
+# ad -> (fonksiyon, başarılı sayılan durum kodları); contention'da 409 beklenen sonuçtur
+SCENARIOS = {
+    "login": (login, {200}),
+    "availability": (availability, {200}),
+    "contention": (contention, {201, 409}),
+    "admin": (admin_listing, {200}),
+    "calendar": (calendar, {200}),
+}
+MIX_WEIGHTS = {"login": 1, "availability": 5, "contention": 1, "admin": 1, "calendar": 2}
+
+
+def _picker(name: str):
+    if name != "mix":
+        return lambda rng: name
+    names, weights = list(MIX_WEIGHTS), list(MIX_WEIGHTS.values())
+    return lambda rng: rng.choices(names, weights)[0]
+
+
+async def run_scenario(client, ctx: Context, name: str, concurrency: int, duration: float, seed: int) -> dict:
+    pick = _picker(name)
+    latencies: list = []
+    statuses: Counter = Counter()
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(wid: int):
+        nonlocal errors
+        rng = random.Random(f"{seed}:{name}:{wid}")
+        while time.perf_counter() < deadline:
+            fn, ok = SCENARIOS[pick(rng)]
+            t = time.perf_counter()
+            try:
+                code = (await fn(client, ctx, rng)).status_code
+            except Exception as e:  # bağlantı hatası ya da uygulama istisnası; hata olarak sayılır
+                code = type(e).__name__
+            latencies.append(time.perf_counter() - t)
+            statuses[code] += 1
+            if code not in ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start, statuses)
+
+
+@asynccontextmanager
+async def open_client(target: str, concurrency: int):
+    if target == "asgi":
+        from app import app
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                yield client
+    else:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=target, timeout=60, limits=limits) as client:
+            yield client
@@ -0,0 +1,70 @@
+import os
+import uuid
+
+import pytest
+
+# app importu veritabanına bağlanmaz (bkz. `python app.py migrate`); birim testleri için bir URL yeterli.
+# DB gerektiren testler bu adrese ulaşamazsa atlanır; import hatası ise testi düşürür.
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://localhost/yaltes_test")
+
+TEST_PASSWORD = "test123"
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture(scope="session")
+def migrated(app_module):
+    from sqlalchemy.exc import OperationalError
+    try:
+        app_module.bootstrap()
+    except OperationalError as e:
+        pytest.skip(f"Postgres not reachable at DATABASE_URL: {e}")
+    return app_module
+
+
+@pytest.fixture(scope="session")
+def client(migrated):
+    from fastapi.testclient import TestClient
+    with TestClient(migrated.app) as c:
+        yield c
+
+
+@pytest.fixture
+def user_token(client):
+    email = f"test-{uuid.uuid4().hex[:12]}@example.com"
+    r = client.post("/auth/register", json={"email": email, "password": TEST_PASSWORD, "full_name": "Test User"})
+    assert r.status_code == 200, r.text
+    r = client.post("/auth/login", json={"email": email, "password": TEST_PASSWORD})
+    assert r.status_code == 200, r.text
+    return r.json()["access_token"]
+
+
+@pytest.fixture
+def vehicle_id(migrated):
+    with migrated.SessionLocal() as db:
+        v = migrated.Vehicle(plate=f"TEST-{uuid.uuid4().hex[:10]}", brand="Test", model="Car",
+                             last_location_name="Test", last_location_lat=41.0, last_location_lng=29.0)
+        db.add(v); db.commit()
+        vid = v.id
+    yield vid
+    with migrated.SessionLocal() as db:
+        v = db.get(migrated.Vehicle, vid)
+        if v is not None:
+            db.delete(v); db.commit()
+
+
+@pytest.fixture
+def query_budget(app_module):
+    """Endpoint başına sorgu bütçesi:
+
+        def test_me(client, user_token, query_budget):
+            with query_budget(1):
+                client.get("/me", headers={"Authorization": f"Bearer {user_token}"})
+
+    Bütçe aşılırsa normalize edilmiş SQL özetiyle QueryBudgetExceeded fırlatır.
+    """
+    return app_module.query_budget
@@ -0,0 +1,22 @@
+# Çoklu worker çalıştırma: PROMETHEUS_MULTIPROC_DIR=/tmp/yaltes-metrics gunicorn -c gunicorn.conf.py app:app
+import os
+import shutil
+
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+
+
+def on_starting(server):
+    # önceki çalıştırmadan kalan metrik dosyaları toplamları şişirmesin (worker'lar başlamadan, master'da)
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # ölen worker'ın livesum gauge dosyalarını (in-flight, havuz) toplamdan çıkar
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,57 @@
+from bench.report import compare, percentile, summarize
+
+
+def _report(**scenarios):
+    return {"scenarios": scenarios}
+
+
+def _stats(rps=100.0, p50=10.0, p99=50.0, error_rate=0.0):
+    return {"throughput_rps": rps, "p50_ms": p50, "p99_ms": p99, "error_rate": error_rate}
+
+
+def test_percentile_nearest_rank():
+    values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert percentile(values, 50) == 5
+    assert percentile(values, 90) == 9
+    assert percentile(values, 99) == 10
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize_counts_errors_and_throughput():
+    s = summarize([0.01, 0.02, 0.03, 0.5], errors=1, elapsed=2.0, statuses={200: 3, 500: 1})
+    assert s["requests"] == 4
+    assert s["error_rate"] == 0.25
+    assert s["throughput_rps"] == 2.0
+    assert s["p50_ms"] == 20.0
+    assert s["max_ms"] == 500.0
+
+
+def test_compare_within_threshold_passes():
+    base = _report(mix=_stats())
+    new = _report(mix=_stats(rps=95.0, p50=10.5, p99=54.0))
+    assert compare(base, new, 0.10) == []
+
+
+def test_compare_flags_throughput_and_latency():
+    base = _report(mix=_stats())
+    new = _report(mix=_stats(rps=80.0, p99=70.0))
+    regressions = compare(base, new, 0.10)
+    assert any("throughput" in r for r in regressions)
+    assert any("p99_ms" in r for r in regressions)
+
+
+def test_compare_error_rate_uses_absolute_tolerance():
+    base = _report(mix=_stats(error_rate=0.01))
+    assert compare(base, _report(mix=_stats(error_rate=0.012)), 0.10) == []
+    assert compare(base, _report(mix=_stats(error_rate=0.05)), 0.10) == ["mix: error_rate 0.01 -> 0.05"]
+
+
+def test_compare_any_error_rise_from_zero_is_a_regression():
+    base = _report(mix=_stats(error_rate=0.0))
+    assert compare(base, _report(mix=_stats(error_rate=0.095)), 0.10) == ["mix: error_rate 0.0 -> 0.095"]
+    assert compare(base, _report(mix=_stats(error_rate=0.001)), 0.10) == ["mix: error_rate 0.0 -> 0.001"]
+
+
+def test_compare_missing_scenario_is_a_regression():
+    base = _report(mix=_stats(), login=_stats())
+    assert compare(base, _report(mix=_stats()), 0.10) == ["login: missing from new report"]
@@ -0,0 +1,159 @@
+import asyncio
+import uuid
+
+
+async def _collect(agen, limit=10):
+    frames = []
+    async for frame in agen:
+        frames.append(frame)
+        if len(frames) >= limit:
+            break
+    return frames
+
+
+# ----------------------------- _event_stream -----------------------------
+def test_stream_ends_with_reset_when_token_expires(app_module):
+    frames = asyncio.run(_collect(app_module._event_stream(uuid.uuid4(), False, None, expires_in=0.05)))
+    assert frames[0].startswith("retry:")
+    assert "event: reset" in frames[-1]
+
+
+def test_stream_closes_quietly_at_reauth_interval(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.settings, "EVENTS_REAUTH_SECONDS", 0.05)
+    frames = asyncio.run(_collect(app_module._event_stream(uuid.uuid4(), False, None, expires_in=3600)))
+    assert frames == ["retry: 3000\n\n"]
+
+
+# ----------------------------- EventHub -----------------------------
+def _seqs(events):
+    return [ev[0] for ev in events]
+
+
+def test_resume_replays_events_after_last_id(app_module):
+    hub = app_module.EventHub(queue_size=10, backlog=100)
+    me, other = uuid.uuid4(), uuid.uuid4()
+    hub.publish("vehicle.created", {"id": 1})
+    hub.publish("booking.created", {"id": 2}, audience=me)
+    hub.publish("booking.created", {"id": 3}, audience=other)
+    hub.publish("blockout.created", {"id": 4}, audience=app_module.EVENTS_ADMINS)
+    hub.publish("vehicle.updated", {"id": 5})
+
+    async def scenario():
+        user_sub, user_replay, user_reset = hub.subscribe(me, False, f"{hub.epoch}:1")
+        admin_sub, admin_replay, admin_reset = hub.subscribe(uuid.uuid4(), True, f"{hub.epoch}:1")
+        return user_replay, user_reset, admin_replay, admin_reset
+
+    user_replay, user_reset, admin_replay, admin_reset = asyncio.run(scenario())
+    assert not user_reset and not admin_reset
+    assert _seqs(user_replay) == [2, 5]  # başkasının rezervasyonu ve admin olayı yok
+    assert _seqs(admin_replay) == [2, 3, 4, 5]
+    assert user_replay[0][2].startswith(f"id: {hub.epoch}:2\nevent: booking.created\n")
+
+
+def test_resume_without_id_replays_nothing(app_module):
+    hub = app_module.EventHub(queue_size=10, backlog=100)
+    hub.publish("vehicle.created", {"id": 1})
+
+    async def scenario():
+        return hub.subscribe(uuid.uuid4(), False, None)
+
+    _, replay, reset = asyncio.run(scenario())
+    assert replay == [] and reset is False
+
+
+def test_reset_when_resume_point_was_trimmed(app_module):
+    hub = app_module.EventHub(queue_size=10, backlog=2)
+    for i in range(5):
+        hub.publish("vehicle.updated", {"id": i})
+
+    async def scenario():
+        trimmed = hub.subscribe(uuid.uuid4(), False, f"{hub.epoch}:1")
+        in_range = hub.subscribe(uuid.uuid4(), False, f"{hub.epoch}:3")
+        return trimmed, in_range
+
+    (_, replay, reset), (_, in_range_replay, in_range_reset) = asyncio.run(scenario())
+    assert reset is True and replay == []
+    assert in_range_reset is False and _seqs(in_range_replay) == [4, 5]
+
+
+def test_reset_on_foreign_epoch_or_malformed_id(app_module):
+    hub = app_module.EventHub(queue_size=10, backlog=100)
+    hub.publish("vehicle.updated", {"id": 1})
+
+    async def scenario():
+        return (hub.subscribe(uuid.uuid4(), False, "deadbeef:1"),
+                hub.subscribe(uuid.uuid4(), False, f"{hub.epoch}:abc"))
+
+    (_, r1, reset1), (_, r2, reset2) = asyncio.run(scenario())
+    assert reset1 is True and r1 == []
+    assert reset2 is True and r2 == []
+    assert hub.reset_frame() == f"id: {hub.epoch}:1\nevent: reset\ndata: {{}}\n\n"
+
+
+def test_live_events_are_fanned_out_by_audience(app_module):
+    hub = app_module.EventHub(queue_size=10, backlog=100)
+    me = uuid.uuid4()
+
+    async def scenario():
+        mine, _, _ = hub.subscribe(me, False, None)
+        other, _, _ = hub.subscribe(uuid.uuid4(), False, None)
+        hub.publish("booking.updated", {"id": 1}, audience=me)
+        hub.publish("vehicle.deleted", {"id": 2})
+        await asyncio.sleep(0)  # call_soon_threadsafe ile planlanan fan-out çalışsın
+        drain = lambda q: [q.get_nowait()[0] for _ in range(q.qsize())]
+        return drain(mine.queue), drain(other.queue)
+
+    mine, other = asyncio.run(scenario())
+    assert mine == [1, 2]
+    assert other == [2]
+
+
+def test_overflow_disconnects_subscriber(app_module):
+    hub = app_module.EventHub(queue_size=2, backlog=100)
+
+    async def scenario():
+        slow, _, _ = hub.subscribe(uuid.uuid4(), False, None)
+        fast, _, _ = hub.subscribe(uuid.uuid4(), False, None)
+        for i in range(2):
+            hub.publish("vehicle.updated", {"id": i})
+        await asyncio.sleep(0)
+        fast.queue.get_nowait(); fast.queue.get_nowait()  # hızlı abone yetişiyor
+        hub.publish("vehicle.updated", {"id": 2})
+        await asyncio.sleep(0)
+        slow_items = [slow.queue.get_nowait() for _ in range(slow.queue.qsize())]
+        return slow, fast, slow_items
+
+    slow, fast, slow_items = asyncio.run(scenario())
+    assert slow_items == [None]  # kuyruk boşaltıldı, akış sonlandırma işareti
+    assert slow not in hub._subs
+    assert fast in hub._subs and fast.queue.qsize() == 1
+
+
+def test_unsubscribe_removes_subscriber(app_module):
+    hub = app_module.EventHub(queue_size=2, backlog=10)
+
+    async def scenario():
+        sub, _, _ = hub.subscribe(uuid.uuid4(), False, None)
+        hub.unsubscribe(sub)
+        hub.publish("vehicle.updated", {"id": 1})
+        await asyncio.sleep(0)
+        return sub
+
+    sub = asyncio.run(scenario())
+    assert sub not in hub._subs and sub.queue.empty()
+
+
+# ----------------------------- vehicle events (Postgres) -----------------------------
+def test_vehicle_updated_diff_uses_json_format(migrated, vehicle_id, monkeypatch):
+    published = []
+    monkeypatch.setattr(migrated, "_publish_vehicle", lambda kind, data: published.append((kind, data)))
+    with migrated.SessionLocal() as db:
+        migrated.update_vehicle(vehicle_id, migrated.VehicleUpdate(last_location_name="Depo", status="maintenance"),
+                                current=None, db=db)
+    (kind, diff), = published
+    assert kind == "vehicle.updated"
+    assert set(diff) == {"id", "last_location_name", "status", "last_location_updated_at"}
+    assert diff["id"] == str(vehicle_id) and diff["status"] == "maintenance"
+    # vehicle.created ile aynı ISO biçimi
+    assert "T" in diff["last_location_updated_at"]
+    assert migrated.dt.datetime.fromisoformat(diff["last_location_updated_at"]).tzinfo is not None
@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+prom = pytest.importorskip("prometheus_client")
+
+
+def _checked_out():
+    return prom.REGISTRY.get_sample_value("db_pool_checked_out", {"db": "primary"})
+
+
+def test_pool_gauges_follow_checkout_and_return(migrated):
+    with migrated.engine.connect():
+        pass
+    before = _checked_out()
+    with migrated.engine.connect():
+        assert _checked_out() == before + 1
+    assert _checked_out() == before
+
+
+def test_failed_statement_does_not_leak_query_start(migrated):
+    with migrated.engine.connect() as conn:
+        with pytest.raises(ProgrammingError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        assert not conn.info.get("query_start")
+        conn.rollback()
+        conn.execute(text("SELECT 1"))
+        assert not conn.info.get("query_start")
@@ -0,0 +1,83 @@
+import datetime as dt
+
+import pytest
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+# ----------------------------- normalize_sql / QueryLog -----------------------------
+def test_normalize_sql_replaces_binds_literals_and_in_lists(app_module):
+    sql = ("SELECT users.id FROM users\n  WHERE users.id = %(pk_1)s AND users.email = 'a@b.c'"
+           " AND users.id IN (%(id_1_1)s, %(id_1_2)s,\n %(id_1_3)s) LIMIT 10")
+    assert app_module.normalize_sql(sql) == (
+        "SELECT users.id FROM users WHERE users.id = ? AND users.email = ? AND users.id IN (?) LIMIT ?"
+    )
+
+
+def test_normalize_sql_collapses_cast_in_lists(app_module):
+    sql = "SELECT vehicles.id FROM vehicles WHERE vehicles.id IN (%(p_1)s::UUID, %(p_2)s::UUID, %(p_3)s::UUID)"
+    assert app_module.normalize_sql(sql) == "SELECT vehicles.id FROM vehicles WHERE vehicles.id IN (?)"
+
+
+def test_normalize_sql_keeps_casts_and_function_arity(app_module):
+    sql = "SELECT 1 FROM bookings WHERE time_range && tstzrange(:s, :e, '[)') AND status::text = 'it''s'"
+    assert app_module.normalize_sql(sql) == (
+        "SELECT ? FROM bookings WHERE time_range && tstzrange(?, ?, ?) AND status::text = ?"
+    )
+
+
+def test_query_log_groups_by_normalized_sql(app_module):
+    log = app_module.QueryLog(record=True)
+    for i in range(3):
+        log.add(f"SELECT * FROM device_tokens WHERE user_id = %(user_id_{i})s", 0.002)
+    log.add("SELECT * FROM users WHERE id = %(pk_1)s", 0.010)
+    assert log.count == 4
+    assert log.seconds == pytest.approx(0.016)
+    grouped = log.grouped()
+    assert [(sql, n) for sql, n, _ in grouped] == [
+        ("SELECT * FROM device_tokens WHERE user_id = ?", 3),
+        ("SELECT * FROM users WHERE id = ?", 1),
+    ]
+    assert grouped[0][2] == pytest.approx(0.006)
+
+
+def test_query_log_without_recording_only_counts(app_module):
+    log = app_module.QueryLog()
+    log.add("SELECT 1", 0.001)
+    assert log.count == 1 and log.queries is None and log.grouped() == []
+
+
+def test_query_budget_raises_with_summary(app_module):
+    with pytest.raises(app_module.QueryBudgetExceeded, match=r"2 queries > budget 1"):
+        with app_module.query_budget(1) as rec:
+            rec.add("SELECT 1", 0.001)
+            rec.add("SELECT 2", 0.001)
+
+
+# ----------------------------- endpoint budgets (Postgres) -----------------------------
+def test_get_current_user_costs_one_query(client, user_token, query_budget):
+    with query_budget(1):
+        r = client.get("/me", headers=_auth(user_token))
+    assert r.status_code == 200
+
+
+def test_availability_budget(client, vehicle_id, query_budget):
+    frm = dt.datetime.now(dt.timezone.utc) + dt.timedelta(days=900)
+    with query_budget(2):
+        r = client.get("/availability", params={"frm": frm.isoformat(),
+                                                "to": (frm + dt.timedelta(hours=2)).isoformat()})
+    assert r.status_code == 200
+    assert str(vehicle_id) in {v["id"] for v in r.json()}
+
+
+def test_create_booking_budget(client, user_token, vehicle_id, query_budget):
+    # kullanıcı (1) + çakışma kontrolü (2) + insert/refresh (2) + admin bildirimi (2)
+    s = dt.datetime.now(dt.timezone.utc) + dt.timedelta(days=900)
+    with query_budget(7):
+        r = client.post("/bookings", headers=_auth(user_token), json={
+            "vehicle_id": str(vehicle_id), "starts_at": s.isoformat(),
+            "ends_at": (s + dt.timedelta(hours=2)).isoformat(),
+        })
+    assert r.status_code == 201, r.text
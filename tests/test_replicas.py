@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+
+
+class _FakeSession:
+    def __init__(self, exc=None):
+        self.exc = exc
+        self.closed = False
+
+    def connection(self):
+        if self.exc is not None:
+            raise self.exc
+
+    def close(self):
+        self.closed = True
+
+
+def _router(app_module, sessions, retry=30.0):
+    # motorlar hiç bağlanmaz; oturumlar sahte
+    r = app_module.ReplicaRouter([f"postgresql+psycopg2://replica{i}/yaltes" for i in range(len(sessions))], retry)
+    r.sessions = [lambda s=s: s for s in sessions]
+    return r
+
+
+def _read_db(app_module, monkeypatch, router):
+    monkeypatch.setattr(app_module, "replica_router", router)
+    gen = app_module.get_read_db()
+    return gen, next(gen)
+
+
+def _refused():
+    return OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+
+# ----------------------------- ReplicaRouter -----------------------------
+def test_candidates_rotate_round_robin(app_module):
+    r = _router(app_module, [_FakeSession() for _ in range(3)])
+    assert [r.candidates() for _ in range(4)] == [[0, 1, 2], [1, 2, 0], [2, 0, 1], [0, 1, 2]]
+
+
+def test_no_replicas_means_no_candidates(app_module):
+    assert app_module.ReplicaRouter([], 30.0).candidates() == []
+
+
+def test_marked_down_replica_is_skipped_until_retry(app_module, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(app_module.time, "monotonic", lambda: now[0])
+    r = _router(app_module, [_FakeSession(), _FakeSession()], retry=30.0)
+    r.mark_down(0, _refused())
+    assert r.candidates() == [1]
+    now[0] += 29.9
+    assert r.candidates() == [1]
+    now[0] += 0.2
+    assert sorted(r.candidates()) == [0, 1]
+
+
+# ----------------------------- get_read_db -----------------------------
+def test_read_db_uses_healthy_replica(app_module, monkeypatch):
+    s0, s1 = _FakeSession(), _FakeSession()
+    gen, db = _read_db(app_module, monkeypatch, _router(app_module, [s0, s1]))
+    assert db is s0
+    gen.close()
+    assert s0.closed and not s1.closed
+
+
+def test_read_db_marks_down_failing_replica(app_module, monkeypatch):
+    bad, good = _FakeSession(_refused()), _FakeSession()
+    router = _router(app_module, [bad, good])
+    gen, db = _read_db(app_module, monkeypatch, router)
+    assert db is good and bad.closed
+    assert router.candidates() == [1]
+    gen.close()
+
+
+def test_read_db_skips_exhausted_pool_without_marking_down(app_module, monkeypatch):
+    busy, good = _FakeSession(PoolTimeoutError("pool exhausted")), _FakeSession()
+    router = _router(app_module, [busy, good])
+    gen, db = _read_db(app_module, monkeypatch, router)
+    assert db is good and busy.closed
+    assert sorted(router.candidates()) == [0, 1]
+    gen.close()
+
+
+def test_read_db_falls_back_to_primary(app_module, monkeypatch):
+    router = _router(app_module, [_FakeSession(_refused()), _FakeSession(PoolTimeoutError("pool exhausted"))])
+    gen, db = _read_db(app_module, monkeypatch, router)
+    assert db.get_bind() is app_module.engine
+    gen.close()
+
+
+def test_read_db_falls_back_when_replica_is_unreachable(app_module, monkeypatch):
+    # gerçek sürücü hatası: kapalı porta bağlanma denemesi DBAPIError verir
+    router = app_module.ReplicaRouter(["postgresql+psycopg2://yaltes@127.0.0.1:1/yaltes?connect_timeout=2"], 30.0)
+    gen, db = _read_db(app_module, monkeypatch, router)
+    assert db.get_bind() is app_module.engine
+    assert router.candidates() == []
+    gen.close()
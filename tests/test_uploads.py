@@ -0,0 +1,167 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def uploads(app_module, tmp_path, monkeypatch):
+    for attr, sub in (("UPLOAD_DIR", "uploads"), ("UPLOAD_TMP_DIR", "uploads/.tmp"),
+                      ("VARIANT_DIR", "uploads/variants")):
+        d = tmp_path / sub
+        d.mkdir(parents=True, exist_ok=True)
+        monkeypatch.setattr(app_module, attr, d)
+    from fastapi.testclient import TestClient
+    return TestClient(app_module.app)  # lifespan yok: DB gerekmez
+
+
+def _png(size=(8, 8), noise=False) -> bytes:
+    if noise:  # sıkıştırılamaz; dosya birkaç UPLOAD_CHUNK'a yayılır
+        im = Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3))
+    else:
+        im = Image.new("RGB", size, (200, 30, 30))
+    buf = io.BytesIO()
+    im.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _upload(client, data: bytes, filename="car.jpg", field="file"):
+    return client.post("/upload", files={field: (filename, data, "application/octet-stream")})
+
+
+def _stored(app_module):
+    return sorted(p.name for p in app_module.UPLOAD_DIR.iterdir() if p.is_file())
+
+
+def _tmp_files(app_module):
+    return list(app_module.UPLOAD_TMP_DIR.iterdir())
+
+
+# ----------------------------- upload -----------------------------
+def test_upload_is_content_addressed_and_sniffed(app_module, uploads):
+    data = _png()
+    r = _upload(uploads, data, filename="car.jpg")  # uzantı yanıltıcı; içerik PNG
+    assert r.status_code == 200, r.text
+    name = f"{hashlib.sha256(data).hexdigest()}.png"
+    assert r.json()["url"].endswith(f"/images/{name}")
+    assert r.json()["thumb_url"].endswith(f"/images/{name}?w={app_module.THUMB_WIDTH}")
+    assert (app_module.UPLOAD_DIR / name).read_bytes() == data
+    assert not _tmp_files(app_module)
+
+
+def test_upload_streams_large_files_in_chunks(app_module, uploads, monkeypatch):
+    from starlette.requests import Request
+
+    def no_form(*_, **__):
+        raise AssertionError("upload must not spool through request.form()")
+
+    monkeypatch.setattr(Request, "form", no_form)
+    data = _png((800, 800), noise=True)
+    assert len(data) > 1.5 * app_module.UPLOAD_CHUNK
+    r = _upload(uploads, data)
+    assert r.status_code == 200, r.text
+    assert _stored(app_module) == [f"{hashlib.sha256(data).hexdigest()}.png"]
+
+
+def test_same_content_is_stored_once(app_module, uploads):
+    data = _png()
+    first, second = _upload(uploads, data, "a.png").json(), _upload(uploads, data, "b.png").json()
+    assert first == second
+    assert len(_stored(app_module)) == 1
+    assert not _tmp_files(app_module)
+
+
+def test_unknown_type_is_415(app_module, uploads):
+    r = _upload(uploads, b"%PDF-1.7 not an image" * 10, filename="car.png")
+    assert r.status_code == 415
+    assert not _stored(app_module) and not _tmp_files(app_module)
+
+
+def test_corrupt_image_is_415(app_module, uploads):
+    r = _upload(uploads, _png()[:40] + b"\0" * 200)
+    assert r.status_code == 415
+    assert not _stored(app_module) and not _tmp_files(app_module)
+
+
+def test_missing_file_field_is_422(app_module, uploads):
+    assert _upload(uploads, _png(), field="photo").status_code == 422
+
+
+def test_empty_file_is_400(app_module, uploads):
+    assert _upload(uploads, b"").status_code == 400
+
+
+def test_missing_content_length_is_411(uploads):
+    def body():
+        yield b"--x\r\n"
+
+    r = uploads.post("/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=x"})
+    assert r.status_code == 411
+
+
+def test_declared_length_over_limit_is_413(app_module, uploads, monkeypatch):
+    monkeypatch.setattr(app_module.settings, "UPLOAD_MAX_BYTES", 1000)
+    r = _upload(uploads, b"\x89PNG\r\n\x1a\n" + b"\0" * (app_module.UPLOAD_MULTIPART_OVERHEAD + 1000))
+    assert r.status_code == 413
+
+
+def test_file_part_over_limit_is_413(app_module, uploads, monkeypatch):
+    # Content-Length multipart payı içinde, dosya parçası sınırı aşıyor
+    monkeypatch.setattr(app_module.settings, "UPLOAD_MAX_BYTES", 1000)
+    r = _upload(uploads, b"\x89PNG\r\n\x1a\n" + b"\0" * 5000)
+    assert r.status_code == 413
+    assert not _stored(app_module) and not _tmp_files(app_module)
+
+
+# ----------------------------- /images -----------------------------
+def _uploaded_name(client) -> str:
+    r = client.post("/upload", files={"file": ("c.png", _png((64, 48)))})
+    return r.json()["url"].rsplit("/", 1)[1]
+
+
+def test_original_is_immutable_with_etag(app_module, uploads):
+    name = _uploaded_name(uploads)
+    r = uploads.get(f"/images/{name}")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/png"
+    assert r.headers["cache-control"] == app_module._IMMUTABLE
+    assert r.headers["etag"] == f'"{name.split(".")[0]}-0-webp"'
+
+
+def test_variant_is_rendered_and_immutable(app_module, uploads):
+    name = _uploaded_name(uploads)
+    r = uploads.get(f"/images/{name}", params={"w": 160, "fmt": "jpg"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/jpeg"
+    assert r.headers["cache-control"] == app_module._IMMUTABLE
+    assert r.headers["etag"] == f'"{name.split(".")[0]}-160-jpg"'
+    assert (app_module.VARIANT_DIR / f"{name.split('.')[0]}_w160.jpg").exists()
+
+
+def test_invalid_variant_params_are_400(uploads):
+    name = _uploaded_name(uploads)
+    assert uploads.get(f"/images/{name}", params={"w": 123}).status_code == 400
+    assert uploads.get(f"/images/{name}", params={"w": 160, "fmt": "gif"}).status_code == 400
+
+
+def test_unknown_image_is_404(uploads):
+    assert uploads.get(f"/images/{'0' * 64}.png").status_code == 404
+    assert uploads.get("/images/../app.py").status_code == 404
+
+
+def test_failed_render_falls_back_to_short_cached_original(app_module, uploads, monkeypatch):
+    name = _uploaded_name(uploads)
+
+    def boom(*_):
+        raise OSError("encoder missing")
+
+    monkeypatch.setattr(app_module, "_render_variant", boom)
+    r = uploads.get(f"/images/{name}", params={"w": 640})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/png"
+    assert r.headers["cache-control"] == "public, max-age=3600"
+    assert r.headers.get("etag") != f'"{name.split(".")[0]}-640-webp"'
+    assert not app_module._variant_jobs